@@ -12,6 +12,8 @@ class User(AbstractUser):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='student')
     phone = models.CharField(max_length=15, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Resized WebP/JPEG copies of the avatar, filled in by accounts.tasks.process_avatar
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     university = models.CharField(max_length=100, blank=True)
     student_id = models.CharField(max_length=50, blank=True)
     course = models.CharField(max_length=100, blank=True)
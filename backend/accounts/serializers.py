@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from core.images import srcset
 from .models import User, Profile
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -57,12 +58,13 @@ class ProfileSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     profile = ProfileSerializer(read_only=True)
     avatar_url = serializers.SerializerMethodField()
+    avatar_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'phone',
-            'role', 'avatar', 'avatar_url', 'university', 'student_id', 'course',
+            'role', 'avatar', 'avatar_url', 'avatar_srcset', 'university', 'student_id', 'course',
             'year_of_study', 'business_name', 'verified', 'created_at', 'profile'
         ]
         read_only_fields = ['id', 'created_at', 'verified']
@@ -71,6 +73,11 @@ class UserSerializer(serializers.ModelSerializer):
         if obj.avatar:
             return self.context['request'].build_absolute_uri(obj.avatar.url)
         return None
+    
+    def get_avatar_srcset(self, obj):
+        if obj.avatar:
+            return srcset(self.context['request'], obj.avatar.storage, obj.avatar_variants)
+        return ''
 
 class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
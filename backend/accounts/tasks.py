@@ -0,0 +1,25 @@
+from celery import shared_task
+from django.utils import timezone
+from core.images import build_variants, delete_files, variant_names
+from .models import User
+
+
+@shared_task
+def process_avatar(user_id, avatar_name, stale_variants=()):
+    """Generate thumbnail and WebP variants for a user's uploaded avatar"""
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return
+    if stale_variants and user.avatar:
+        delete_files(user.avatar.storage, stale_variants)
+    if not user.avatar or user.avatar.name != avatar_name:
+        # A newer upload replaced this one; its own task produces the variants
+        return
+    variants = build_variants(user.avatar)
+    # update() skips auto_now; bump updated_at so ETags of payloads nesting the user change
+    updated = User.objects.filter(pk=user_id, avatar=avatar_name).update(
+        avatar_variants=variants, updated_at=timezone.now()
+    )
+    if not updated:
+        delete_files(user.avatar.storage, variant_names(variants))
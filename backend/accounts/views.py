@@ -6,6 +6,7 @@ from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth import authenticate
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
@@ -13,7 +14,9 @@ import pyotp
 import qrcode
 import io
 import base64
+from core.images import variant_names
 from .models import User, Profile
+from .tasks import process_avatar
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer,
     ProfileSerializer, PasswordResetSerializer, PasswordResetConfirmSerializer
@@ -72,8 +75,13 @@ class ProfileView(generics.RetrieveUpdateAPIView):
 def upload_avatar(request):
     user = request.user
     if 'avatar' in request.FILES:
+        stale_variants = sorted(variant_names(user.avatar_variants))
         user.avatar = request.FILES['avatar']
+        user.avatar_variants = {}
         user.save()
+        # Resize off the request path once the new file name is committed
+        avatar_name = user.avatar.name
+        transaction.on_commit(lambda: process_avatar.delay(user.pk, avatar_name, stale_variants))
         return Response({
             'avatar_url': request.build_absolute_uri(user.avatar.url)
         })
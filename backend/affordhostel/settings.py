@@ -2,6 +2,7 @@ import os
 import dj_database_url
 from pathlib import Path
 from decouple import config
+from celery.schedules import crontab
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -33,6 +34,7 @@ INSTALLED_APPS = [
     'reviews',
     'notifications',
     'payments',
+    'analytics',
 ]
 
 MIDDLEWARE = [
@@ -182,9 +184,66 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 # Redis Configuration (for Heroku Redis)
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379')
 
+# Cache configuration: Redis when REDIS_URL is provided (environment or .env), local memory otherwise (dev/tests)
+if config('REDIS_URL', default=''):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds an anonymous hostel list/detail response stays cached
+HOSTEL_CACHE_TIMEOUT = config('HOSTEL_CACHE_TIMEOUT', default=300, cast=int)
+
+# Minutes a new booking holds its room before the unit returns to inventory
+BOOKING_HOLD_MINUTES = config('BOOKING_HOLD_MINUTES', default=30, cast=int)
+
+# Hours an unpaid booking stays pending before the sweep expires it
+BOOKING_PENDING_EXPIRY_HOURS = config('BOOKING_PENDING_EXPIRY_HOURS', default=48, cast=int)
+
+# Minutes a payment may wait on the provider before the sweep marks it failed
+PAYMENT_TIMEOUT_MINUTES = config('PAYMENT_TIMEOUT_MINUTES', default=30, cast=int)
+
+# Hours a stored Idempotency-Key response is replayed for
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+
 # Celery Configuration
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
+# Run tasks in-process when no broker is configured (local development and tests)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not config('REDIS_URL', default=''), cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_BEAT_SCHEDULE = {
+    'release-expired-room-holds': {
+        'task': 'bookings.tasks.release_expired_room_holds',
+        'schedule': 60.0,
+    },
+    'expire-stale-reservations': {
+        'task': 'bookings.tasks.expire_stale_reservations',
+        'schedule': 300.0,
+    },
+    'prune-idempotency-keys': {
+        'task': 'core.tasks.prune_idempotency_keys',
+        'schedule': crontab(minute=15),
+    },
+    'refresh-similar-hostels': {
+        'task': 'hostels.tasks.refresh_similar_hostels',
+        'schedule': 600.0,
+    },
+    # Incremental runs keep unchanged pairs' scores; a nightly pass picks up feature scaling drift
+    'rebuild-similar-hostels': {
+        'task': 'hostels.tasks.refresh_similar_hostels',
+        'schedule': crontab(hour=3, minute=0),
+        'kwargs': {'full': True},
+    },
+}
 
 # M-Pesa Configuration
 MPESA_CONSUMER_KEY = config('MPESA_CONSUMER_KEY', default='')
@@ -192,6 +251,13 @@ MPESA_CONSUMER_SECRET = config('MPESA_CONSUMER_SECRET', default='')
 MPESA_SHORTCODE = config('MPESA_SHORTCODE', default='174379')
 MPESA_PASSKEY = config('MPESA_PASSKEY', default='')
 MPESA_CALLBACK_URL = config('MPESA_CALLBACK_URL', default='https://yourdomain.com/api/payments/mpesa/callback/')
+MPESA_BASE_URL = config('MPESA_BASE_URL', default='https://sandbox.safaricom.co.ke')
+# 'daraja' calls MPESA_BASE_URL; 'local' (opt-in, for development) accepts every STK push without the network
+MPESA_CLIENT = config('MPESA_CLIENT', default='daraja')
+# Seconds to connect to / wait on Daraja, and retries for requests it never received
+MPESA_CONNECT_TIMEOUT = config('MPESA_CONNECT_TIMEOUT', default=3.05, cast=float)
+MPESA_READ_TIMEOUT = config('MPESA_READ_TIMEOUT', default=10, cast=float)
+MPESA_MAX_RETRIES = config('MPESA_MAX_RETRIES', default=2, cast=int)
 
 # Frontend URL
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
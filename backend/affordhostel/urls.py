@@ -12,6 +12,7 @@ urlpatterns = [
     path('api/notifications/', include('notifications.urls')),
     path('api/payments/', include('payments.urls')),
     path('api/core/', include('core.urls')),
+    path('api/analytics/', include('analytics.urls')),
 ]
 
 if settings.DEBUG:
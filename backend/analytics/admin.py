@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import HostelDailyStats
+
+@admin.register(HostelDailyStats)
+class HostelDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['hostel', 'date', 'bookings_created', 'bookings_confirmed', 'revenue', 'review_count']
+    list_filter = ['date']
+    search_fields = ['hostel__name']
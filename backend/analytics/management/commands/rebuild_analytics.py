@@ -0,0 +1,49 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from analytics.models import HostelDailyStats
+from analytics.rollups import STATUS_COUNTERS
+from bookings.models import Booking, BookingStatusHistory
+from payments.models import Payment
+from reviews.models import Review
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily analytics rollups from bookings, status history, payments and reviews'
+
+    def handle(self, *args, **options):
+        stats = defaultdict(lambda: defaultdict(int))
+
+        bookings = Booking.objects.annotate(day=TruncDate('created_at')).values('hostel', 'day').annotate(total=Count('id'))
+        for row in bookings.order_by():
+            stats[row['hostel'], row['day']]['bookings_created'] += row['total']
+
+        history = BookingStatusHistory.objects.filter(status__in=STATUS_COUNTERS).annotate(
+            day=TruncDate('created_at'), hostel=F('booking__hostel')
+        ).values('hostel', 'day', 'status').annotate(total=Count('id'))
+        for row in history.order_by():
+            stats[row['hostel'], row['day']][STATUS_COUNTERS[row['status']]] += row['total']
+
+        payments = Payment.objects.filter(status='completed').annotate(
+            day=TruncDate('updated_at'), hostel=F('booking__hostel')
+        ).values('hostel', 'day').annotate(total=Sum('amount'))
+        for row in payments.order_by():
+            stats[row['hostel'], row['day']]['revenue'] += row['total']
+
+        reviews = Review.objects.annotate(day=TruncDate('created_at')).values('hostel', 'day').annotate(
+            rating=Sum('rating'), total=Count('id')
+        )
+        for row in reviews.order_by():
+            stats[row['hostel'], row['day']]['rating_sum'] += row['rating']
+            stats[row['hostel'], row['day']]['review_count'] += row['total']
+
+        with transaction.atomic():
+            HostelDailyStats.objects.all().delete()
+            HostelDailyStats.objects.bulk_create(
+                [HostelDailyStats(hostel_id=hostel_id, date=day, **fields) for (hostel_id, day), fields in stats.items()],
+                batch_size=1000
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(stats)} daily analytics rows'))
@@ -0,0 +1,24 @@
+from django.db import models
+from hostels.models import Hostel
+
+class HostelDailyStats(models.Model):
+    """Per-hostel, per-day event counters kept current by analytics.rollups"""
+    hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    bookings_created = models.PositiveIntegerField(default=0)
+    bookings_confirmed = models.PositiveIntegerField(default=0)
+    bookings_cancelled = models.PositiveIntegerField(default=0)
+    bookings_rejected = models.PositiveIntegerField(default=0)
+    bookings_completed = models.PositiveIntegerField(default=0)
+    bookings_expired = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Rating deltas of reviews written that day, for the rating trend
+    rating_sum = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['hostel', 'date']
+        ordering = ['hostel', 'date']
+    
+    def __str__(self):
+        return f"{self.hostel.name} - {self.date}"
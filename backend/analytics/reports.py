@@ -0,0 +1,91 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import Sum
+from bookings.availability import occupancy
+from hostels.models import RoomType
+from .models import HostelDailyStats
+
+COUNTERS = [
+    'bookings_created', 'bookings_confirmed', 'bookings_cancelled', 'bookings_rejected', 'bookings_completed',
+    'bookings_expired',
+]
+
+
+def _rate(booked, capacity):
+    return round(booked / capacity, 4) if capacity else None
+
+
+def _occupancy(hostel_ids, start, end):
+    """{hostel_id: (booked bed-nights, bed-nights on offer)} over [start, end)"""
+    room_types = list(RoomType.objects.filter(hostel_id__in=hostel_ids, total__gt=0).values_list('pk', 'hostel_id', 'total'))
+    booked = occupancy([pk for pk, _, _ in room_types], start, end)
+    nights = (end - start).days
+    result = defaultdict(lambda: (0, 0))
+    for pk, hostel_id, total in room_types:
+        booked_nights, capacity = result[hostel_id]
+        result[hostel_id] = (
+            booked_nights + sum(min(count, total) for count in booked[pk]),
+            capacity + total * nights
+        )
+    return result
+
+
+def landlord_report(hostels, start, end):
+    """Dashboard figures for hostels over [start, end), read from the daily rollups"""
+    hostels = list(hostels.only('id', 'name', 'rating_sum', 'review_count', 'average_rating').order_by('id'))
+    hostel_ids = [hostel.pk for hostel in hostels]
+
+    rows = defaultdict(list)
+    for row in HostelDailyStats.objects.filter(hostel_id__in=hostel_ids, date__gte=start, date__lt=end).order_by('date'):
+        rows[row.hostel_id].append(row)
+    # Review deltas after the window, to walk the live rating back to each day in it
+    later = {
+        row['hostel']: row for row in HostelDailyStats.objects.filter(hostel_id__in=hostel_ids, date__gte=end).values(
+            'hostel'
+        ).annotate(rating_sum=Sum('rating_sum'), review_count=Sum('review_count'))
+    }
+    occupied = _occupancy(hostel_ids, start, end)
+
+    totals = dict.fromkeys(COUNTERS, 0)
+    totals.update(revenue=Decimal('0'), reviews=0)
+    total_booked = total_capacity = 0
+    report = []
+    for hostel in hostels:
+        summary = dict.fromkeys(COUNTERS, 0)
+        summary.update(revenue=Decimal('0'), reviews=0)
+        rating_sum = hostel.rating_sum - later.get(hostel.pk, {}).get('rating_sum', 0)
+        review_count = hostel.review_count - later.get(hostel.pk, {}).get('review_count', 0)
+        daily = []
+        for row in reversed(rows[hostel.pk]):
+            daily.append({
+                'date': row.date,
+                **{counter: getattr(row, counter) for counter in COUNTERS},
+                'revenue': str(row.revenue),
+                'average_rating': round(rating_sum / review_count, 2) if review_count else None,
+            })
+            rating_sum -= row.rating_sum
+            review_count -= row.review_count
+            for counter in COUNTERS:
+                summary[counter] += getattr(row, counter)
+            summary['revenue'] += row.revenue
+            summary['reviews'] += row.review_count
+        daily.reverse()
+
+        booked, capacity = occupied[hostel.pk]
+        total_booked += booked
+        total_capacity += capacity
+        for key in totals:
+            totals[key] += summary[key]
+        report.append({
+            'id': hostel.pk,
+            'name': hostel.name,
+            'average_rating': hostel.average_rating,
+            **summary,
+            'revenue': str(summary['revenue']),
+            'occupancy_rate': _rate(booked, capacity),
+            'daily': daily,
+        })
+
+    totals['revenue'] = str(totals['revenue'])
+    totals['occupancy_rate'] = _rate(total_booked, total_capacity)
+    return {'start': start, 'end': end, 'totals': totals, 'hostels': report}
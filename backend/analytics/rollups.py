@@ -0,0 +1,55 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import HostelDailyStats
+
+# Booking status -> the HostelDailyStats counter for transitions into it
+STATUS_COUNTERS = {
+    'confirmed': 'bookings_confirmed',
+    'cancelled': 'bookings_cancelled',
+    'rejected': 'bookings_rejected',
+    'completed': 'bookings_completed',
+    'expired': 'bookings_expired',
+}
+
+
+def record(hostel_id, day=None, **deltas):
+    """Add deltas to a hostel's counters for day (today by default), creating the row on first use"""
+    day = day or timezone.localdate()
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    rows = HostelDailyStats.objects.filter(hostel_id=hostel_id, date=day)
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            HostelDailyStats.objects.create(hostel_id=hostel_id, date=day, **deltas)
+    except IntegrityError:
+        # Another request created today's row first
+        rows.update(**increments)
+
+
+def record_booking_created(booking):
+    record(booking.hostel_id, bookings_created=1)
+
+
+def record_status_change(booking, previous_status, new_status):
+    counter = STATUS_COUNTERS.get(new_status)
+    if counter and new_status != previous_status:
+        record(booking.hostel_id, **{counter: 1})
+
+
+def record_status_counts(hostel_counts, new_status):
+    """Bulk record_status_change: hostel_counts maps hostel id -> bookings moved into new_status"""
+    counter = STATUS_COUNTERS.get(new_status)
+    if counter:
+        for hostel_id, count in hostel_counts.items():
+            record(hostel_id, **{counter: count})
+
+
+def record_payment(payment):
+    record(payment.booking.hostel_id, revenue=payment.amount)
+
+
+def record_review(review, rating_delta, count_delta):
+    # Booked against the day the review was written so edits and deletes keep the trend consistent
+    record(review.hostel_id, day=timezone.localdate(review.created_at), rating_sum=rating_delta, review_count=count_delta)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('landlord/', views.landlord_analytics, name='landlord-analytics'),
+]
@@ -0,0 +1,41 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from bookings.availability import parse_window
+from hostels.models import Hostel
+from .reports import landlord_report
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def landlord_analytics(request):
+    """Bookings by status, revenue, occupancy and rating trend per hostel between ?start= and ?end= (end exclusive)"""
+    user = request.user
+    if user.role == 'landlord':
+        landlord_id = user.pk
+    elif user.role in ['agent', 'admin']:
+        landlord_id = request.query_params.get('landlord')
+        if not landlord_id or not landlord_id.isdigit():
+            return Response({'error': 'landlord is required'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        return Response({'error': 'Only landlords can view analytics'}, status=status.HTTP_403_FORBIDDEN)
+    
+    # Default to the last 30 days including today
+    today = timezone.localdate()
+    try:
+        start, end = parse_window(
+            request.query_params.get('start') or (today - timedelta(days=29)).isoformat(),
+            request.query_params.get('end') or (today + timedelta(days=1)).isoformat()
+        )
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    hostels = Hostel.objects.filter(landlord_id=landlord_id)
+    hostel_id = request.query_params.get('hostel')
+    if hostel_id:
+        if not hostel_id.isdigit():
+            return Response({'error': 'hostel must be an id'}, status=status.HTTP_400_BAD_REQUEST)
+        hostels = hostels.filter(pk=hostel_id)
+    
+    return Response(landlord_report(hostels, start, end))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking, BookingStatusHistory
+from .models import Booking, BookingStatusHistory, RoomHold
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -11,4 +11,9 @@ class BookingAdmin(admin.ModelAdmin):
 @admin.register(BookingStatusHistory)
 class BookingStatusHistoryAdmin(admin.ModelAdmin):
     list_display = ['booking', 'status', 'changed_by', 'created_at']
-    list_filter = ['status', 'created_at']
\ No newline at end of file
+    list_filter = ['status', 'created_at']
+
+@admin.register(RoomHold)
+class RoomHoldAdmin(admin.ModelAdmin):
+    list_display = ['booking', 'room_type', 'quantity', 'status', 'expires_at']
+    list_filter = ['status', 'expires_at']
\ No newline at end of file
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from hostels.models import RoomType
+from .models import Booking
+
+# Bookings that take up a bed for the nights between check_in and check_out
+OCCUPYING_STATUSES = ['pending', 'confirmed', 'completed']
+
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 366
+
+
+def parse_window(start, end):
+    """Validate a [start, end) date window given as ISO strings; raises ValueError"""
+    try:
+        start = parse_date(start) if start else timezone.localdate()
+        if start is not None:
+            end = parse_date(end) if end else start + timedelta(days=DEFAULT_WINDOW_DAYS)
+    except ValueError:
+        start = None
+    if start is None or end is None:
+        raise ValueError('Dates must be in YYYY-MM-DD format')
+    if end <= start:
+        raise ValueError('end must be after start')
+    if (end - start).days > MAX_WINDOW_DAYS:
+        raise ValueError(f'The window cannot be longer than {MAX_WINDOW_DAYS} days')
+    return start, end
+
+
+def overlapping_bookings(start, end):
+    return Q(status__in=OCCUPYING_STATUSES, check_in__lt=end, check_out__gt=start)
+
+
+def student_has_overlap(student, check_in, check_out):
+    """Whether the student already holds an active booking for any night of [check_in, check_out)"""
+    return Booking.objects.filter(overlapping_bookings(check_in, check_out), student=student).exists()
+
+
+def occupancy(room_type_ids, start, end):
+    """
+    Beds booked per night of [start, end) for each room type: one range query
+    over the (room_type, check_in, check_out) index, then a sweep over +1/-1
+    events instead of a query per day.
+    """
+    days = (end - start).days
+    deltas = {room_type_id: [0] * (days + 1) for room_type_id in room_type_ids}
+    if not deltas:
+        return {}
+    bookings = Booking.objects.filter(overlapping_bookings(start, end), room_type_id__in=list(deltas)).values_list(
+        'room_type_id', 'check_in', 'check_out'
+    )
+    for room_type_id, check_in, check_out in bookings.iterator():
+        events = deltas[room_type_id]
+        events[(max(check_in, start) - start).days] += 1
+        events[(min(check_out, end) - start).days] -= 1
+
+    result = {}
+    for room_type_id, events in deltas.items():
+        booked, running = [], 0
+        for delta in events[:days]:
+            running += delta
+            booked.append(running)
+        result[room_type_id] = booked
+    return result
+
+
+def calendar(room_types, start, end):
+    """Per-night booked/available counts for each room type over [start, end)"""
+    room_types = list(room_types)
+    booked = occupancy([room_type.pk for room_type in room_types], start, end)
+    calendars = []
+    for room_type in room_types:
+        days = [
+            {
+                'date': start + timedelta(days=offset),
+                'booked': count,
+                'available': max(room_type.total - count, 0),
+            }
+            for offset, count in enumerate(booked[room_type.pk])
+        ]
+        calendars.append({
+            'id': room_type.pk,
+            'type': room_type.type,
+            'total': room_type.total,
+            'min_available': min(day['available'] for day in days),
+            'days': days,
+        })
+    return calendars
+
+
+def hostels_available_between(hostels, start, end):
+    """Narrow a hostel queryset to those with a room type that has a free bed every night of [start, end)"""
+    room_types = RoomType.objects.filter(hostel__in=hostels.order_by().values('pk'), total__gt=0).annotate(
+        overlapping=Count('booking', filter=Q(
+            booking__status__in=OCCUPYING_STATUSES, booking__check_in__lt=end, booking__check_out__gt=start
+        ))
+    )
+    # Fewer overlapping bookings than beds always leaves a bed free; only the
+    # rest need the sweep, since their bookings may not all overlap each other
+    free = room_types.filter(overlapping__lt=F('total')).values('hostel')
+    ambiguous = dict(room_types.filter(overlapping__gte=F('total')).values_list('pk', 'total'))
+    booked = occupancy(ambiguous, start, end)
+    swept = RoomType.objects.filter(
+        pk__in=[pk for pk, total in ambiguous.items() if max(booked[pk]) < total]
+    ).values('hostel')
+    return hostels.filter(Q(pk__in=free) | Q(pk__in=swept))
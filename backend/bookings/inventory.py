@@ -0,0 +1,152 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from hostels.cache import invalidate_hostel
+from hostels.models import Hostel, RoomType
+from .models import RoomHold
+
+logger = logging.getLogger(__name__)
+
+# Booking statuses that hand the room back to inventory
+RELEASE_STATUSES = {'cancelled', 'rejected', 'expired'}
+
+
+class RoomUnavailable(Exception):
+    """No units of the requested room type are left to hold"""
+
+
+def _take(room_type_id, quantity):
+    # Check and decrement in one conditional UPDATE; the row lock serialises concurrent takers
+    return RoomType.objects.filter(pk=room_type_id, available__gte=quantity).update(
+        available=F('available') - quantity
+    ) == 1
+
+
+def _inventory_changed(hostel_ids):
+    # update() skips the RoomType signals, so touch Last-Modified and drop cached pages here
+    hostel_ids = set(hostel_ids)
+    Hostel.objects.filter(pk__in=hostel_ids).update(updated_at=timezone.now())
+    for hostel_id in hostel_ids:
+        transaction.on_commit(lambda hostel_id=hostel_id: invalidate_hostel(hostel_id))
+
+
+def _restock(holds):
+    """Return released (room_type_id, quantity) units to inventory, one UPDATE per room type"""
+    quantities = defaultdict(int)
+    for room_type_id, quantity in holds:
+        quantities[room_type_id] += quantity
+    # Fixed lock order so concurrent releases cannot deadlock on the room type rows
+    for room_type_id in sorted(quantities):
+        RoomType.objects.filter(pk=room_type_id).update(available=F('available') + quantities[room_type_id])
+    _inventory_changed(RoomType.objects.filter(pk__in=quantities).values_list('hostel_id', flat=True))
+
+
+def hold_room(booking, quantity=1):
+    """Reserve a unit of the booking's room type for BOOKING_HOLD_MINUTES; raises RoomUnavailable when sold out"""
+    if not _take(booking.room_type_id, quantity):
+        # The remaining units may only be tied up by lapsed holds nobody has swept yet
+        if not release_expired_holds(room_type_id=booking.room_type_id) or not _take(booking.room_type_id, quantity):
+            raise RoomUnavailable()
+    hold = RoomHold.objects.create(
+        booking=booking,
+        room_type_id=booking.room_type_id,
+        quantity=quantity,
+        expires_at=timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+    )
+    _inventory_changed([booking.hostel_id])
+    return hold
+
+
+@transaction.atomic
+def commit_hold(booking):
+    """Turn the booking's hold into a sale; returns False if it lapsed and the room has sold out since"""
+    now = timezone.now()
+    if RoomHold.objects.filter(booking=booking, status='held').update(status='committed', updated_at=now):
+        return True
+
+    # The hold lapsed before payment arrived (or the booking predates holds): take the unit again
+    hold, _ = RoomHold.objects.get_or_create(
+        booking=booking,
+        defaults={'room_type_id': booking.room_type_id, 'status': 'released', 'expires_at': now}
+    )
+    if not RoomHold.objects.filter(pk=hold.pk, status='released').update(status='committed', updated_at=now):
+        return True
+    if not _take(hold.room_type_id, hold.quantity):
+        logger.warning('Booking %s confirmed but room type %s is sold out', booking.pk, hold.room_type_id)
+        RoomHold.objects.filter(pk=hold.pk).update(status='released', updated_at=now)
+        return False
+    _inventory_changed([booking.hostel_id])
+    return True
+
+
+@transaction.atomic
+def release_hold(booking):
+    """Hand the booking's unit back to inventory; a no-op if it was already released"""
+    hold = RoomHold.objects.filter(booking=booking).exclude(status='released').values(
+        'pk', 'status', 'room_type_id', 'quantity'
+    ).first()
+    if hold is None:
+        return False
+    # Conditional on the status we read so a concurrent release cannot return the unit twice
+    if not RoomHold.objects.filter(pk=hold['pk'], status=hold['status']).update(
+        status='released', updated_at=timezone.now()
+    ):
+        return False
+    RoomType.objects.filter(pk=hold['room_type_id']).update(available=F('available') + hold['quantity'])
+    _inventory_changed([booking.hostel_id])
+    return True
+
+
+@transaction.atomic
+def commit_holds(bookings):
+    """commit_hold for many bookings with one UPDATE; returns ids of those whose room has sold out"""
+    booking_ids = [booking.pk for booking in bookings]
+    RoomHold.objects.filter(booking_id__in=booking_ids, status='held').update(
+        status='committed', updated_at=timezone.now()
+    )
+    committed = set(RoomHold.objects.filter(booking_id__in=booking_ids, status='committed').values_list(
+        'booking_id', flat=True
+    ))
+    # Lapsed or missing holds go through the single path to re-take their unit
+    return {booking.pk for booking in bookings if booking.pk not in committed and not commit_hold(booking)}
+
+
+@transaction.atomic
+def release_holds(booking_ids):
+    """release_hold for many bookings, which the caller has locked"""
+    holds = list(RoomHold.objects.select_for_update().filter(booking_id__in=booking_ids).exclude(
+        status='released'
+    ).values_list('pk', 'room_type_id', 'quantity'))
+    if not holds:
+        return 0
+    RoomHold.objects.filter(pk__in=[pk for pk, _, _ in holds]).update(status='released', updated_at=timezone.now())
+    _restock((room_type_id, quantity) for _, room_type_id, quantity in holds)
+    return len(holds)
+
+
+def release_expired_holds(room_type_id=None, batch_size=500):
+    """Release holds past their expiry in batches; returns how many were released"""
+    released = 0
+    while True:
+        with transaction.atomic():
+            holds = RoomHold.objects.select_for_update(skip_locked=True).filter(
+                status='held', expires_at__lte=timezone.now()
+            )
+            if room_type_id is not None:
+                holds = holds.filter(room_type_id=room_type_id)
+            batch = list(holds.order_by('expires_at').values_list('pk', 'room_type_id', 'quantity')[:batch_size])
+            if not batch:
+                return released
+
+            RoomHold.objects.filter(pk__in=[pk for pk, _, _ in batch]).update(
+                status='released', updated_at=timezone.now()
+            )
+            _restock((hold_room_type_id, quantity) for _, hold_room_type_id, quantity in batch)
+
+        released += len(batch)
+        if len(batch) < batch_size:
+            return released
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from bookings.sweeper import sweep_stale_reservations
+
+
+class Command(BaseCommand):
+    help = 'Expire unpaid pending bookings and fail abandoned payments past their configured age'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        swept = sweep_stale_reservations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {swept['bookings_expired']} bookings and failed {swept['payments_failed']} payments"
+        ))
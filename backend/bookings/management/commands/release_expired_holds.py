@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from bookings.inventory import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Return rooms held by unpaid bookings past their hold expiry to inventory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        released = release_expired_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired room holds'))
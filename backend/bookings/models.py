@@ -1,3 +1,4 @@
+from decimal import Decimal
 from django.db import models
 from django.contrib.auth import get_user_model
 from hostels.models import Hostel, RoomType
@@ -11,6 +12,7 @@ class Booking(models.Model):
         ('rejected', 'Rejected'),
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),
+        ('expired', 'Expired'),
     ]
     
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
@@ -29,12 +31,27 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Booking feeds: a student's own, and everyone's for agents and admins
+            models.Index(fields=['student', '-created_at', '-id']),
+            models.Index(fields=['-created_at', '-id']),
+            # A hostel's bookings by status, for landlords and the status filter
+            models.Index(fields=['hostel', 'status']),
+            # Range scans for the availability calendar and available_between filter
+            models.Index(fields=['room_type', 'check_in', 'check_out']),
+            # Overlap check against a student's own bookings
+            models.Index(fields=['student', 'check_in', 'check_out']),
+            # Keyset scan for the stale pending booking sweep
+            models.Index(fields=['status', 'id']),
+        ]
+    
     def __str__(self):
         return f"{self.student.username} - {self.hostel.name}"
     
     def save(self, *args, **kwargs):
         if not self.service_fee:
-            self.service_fee = self.amount * 0.025  # 2.5% service fee
+            self.service_fee = self.amount * Decimal('0.025')  # 2.5% service fee
         if not self.total_amount:
             self.total_amount = self.amount + self.service_fee
         super().save(*args, **kwargs)
@@ -42,9 +59,34 @@ class Booking(models.Model):
 class BookingStatusHistory(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='status_history')
     status = models.CharField(max_length=20)
-    changed_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Empty for changes made by the system, such as the expiry sweep
+    changed_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     reason = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    def __str__(self):
+        return f"{self.booking} - {self.status}"
+
+class RoomHold(models.Model):
+    """One unit of RoomType.available reserved for a booking until it is paid or expires"""
+    STATUS_CHOICES = [
+        ('held', 'Held'),
+        ('committed', 'Committed'),
+        ('released', 'Released'),
+    ]
+    
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='hold')
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='holds')
+    quantity = models.PositiveIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='held')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+    
     def __str__(self):
         return f"{self.booking} - {self.status}"
\ No newline at end of file
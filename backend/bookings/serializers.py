@@ -1,9 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 from .models import Booking, BookingStatusHistory
+from hostels.models import RoomType
 from hostels.serializers import HostelSerializer, RoomTypeSerializer
 from accounts.serializers import UserSerializer
+from analytics.rollups import record_booking_created
+from core.serializers import DynamicFieldsMixin
+from .availability import student_has_overlap
+from .inventory import RoomUnavailable, hold_room
 
-class BookingSerializer(serializers.ModelSerializer):
+User = get_user_model()
+
+class BookingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     hostel = HostelSerializer(read_only=True)
     room_type = RoomTypeSerializer(read_only=True)
     student = UserSerializer(read_only=True)
@@ -17,7 +26,30 @@ class BookingSerializer(serializers.ModelSerializer):
             'payment_id', 'receipt_url', 'special_requests', 'created_at',
             'updated_at', 'duration_months'
         ]
-        read_only_fields = ['id', 'service_fee', 'total_amount', 'created_at', 'updated_at']
+        # Status changes go through the status endpoints so room holds and history follow them
+        read_only_fields = ['id', 'service_fee', 'total_amount', 'status', 'created_at', 'updated_at']
+    
+    def get_duration_months(self, obj):
+        delta = obj.check_out - obj.check_in
+        return round(delta.days / 30, 1)
+
+class BookingListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Flat list row: related objects by id plus the names a list shows; load with select_related"""
+    hostel_name = serializers.CharField(source='hostel.name', read_only=True)
+    hostel_location = serializers.CharField(source='hostel.location', read_only=True)
+    room_type_name = serializers.CharField(source='room_type.type', read_only=True)
+    student_name = serializers.CharField(source='student.get_full_name', read_only=True)
+    duration_months = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Booking
+        fields = [
+            'id', 'student', 'student_name', 'hostel', 'hostel_name', 'hostel_location',
+            'room_type', 'room_type_name', 'check_in', 'check_out', 'guests', 'amount',
+            'service_fee', 'total_amount', 'status', 'payment_id', 'created_at',
+            'updated_at', 'duration_months'
+        ]
+        read_only_fields = fields
     
     def get_duration_months(self, obj):
         delta = obj.check_out - obj.check_in
@@ -30,24 +62,44 @@ class BookingCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = [
-            'hostel_id', 'room_type_id', 'check_in', 'check_out',
-            'guests', 'amount', 'special_requests'
+            'id', 'hostel_id', 'room_type_id', 'check_in', 'check_out',
+            'guests', 'amount', 'special_requests', 'total_amount', 'status'
         ]
+        read_only_fields = ['id', 'total_amount', 'status']
+    
+    def validate(self, attrs):
+        if attrs['check_out'] <= attrs['check_in']:
+            raise serializers.ValidationError({'check_out': 'Check-out must be after check-in.'})
+        room_type = RoomType.objects.select_related('hostel').filter(
+            id=attrs['room_type_id'], hostel_id=attrs['hostel_id']
+        ).first()
+        if room_type is None:
+            raise serializers.ValidationError({'room_type_id': 'Room type not found for this hostel.'})
+        attrs['room_type'] = room_type
+        return attrs
     
     def create(self, validated_data):
-        hostel_id = validated_data.pop('hostel_id')
-        room_type_id = validated_data.pop('room_type_id')
-        
-        from hostels.models import Hostel, RoomType
-        hostel = Hostel.objects.get(id=hostel_id)
-        room_type = RoomType.objects.get(id=room_type_id)
+        validated_data.pop('hostel_id')
+        validated_data.pop('room_type_id')
+        room_type = validated_data.pop('room_type')
+        student = self.context['request'].user
         
-        booking = Booking.objects.create(
-            student=self.context['request'].user,
-            hostel=hostel,
-            room_type=room_type,
-            **validated_data
-        )
+        with transaction.atomic():
+            # Serialise a student's concurrent requests on their user row so the overlap check cannot race
+            User.objects.select_for_update().filter(pk=student.pk).first()
+            if student_has_overlap(student, validated_data['check_in'], validated_data['check_out']):
+                raise serializers.ValidationError('You already have a booking for overlapping dates.')
+            booking = Booking.objects.create(
+                student=student,
+                hostel=room_type.hostel,
+                room_type=room_type,
+                **validated_data
+            )
+            try:
+                hold_room(booking)
+            except RoomUnavailable:
+                raise serializers.ValidationError({'room_type_id': 'No rooms of this type are available.'})
+            record_booking_created(booking)
         
         return booking
 
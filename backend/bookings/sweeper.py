@@ -0,0 +1,83 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from payments.models import Payment
+from .models import Booking
+from .transitions import apply_transition
+
+# Payments still waiting on the provider; past the timeout nobody will confirm them
+UNSETTLED_PAYMENT_STATUSES = ['pending', 'processing']
+
+EXPIRED_REASON = 'Not paid within the booking window'
+TIMED_OUT_REASON = 'No confirmation received from the payment provider'
+
+
+def batch_query(queryset, last_pk, batch_size):
+    """The next batch of queryset after last_pk, locking its rows and skipping any another transaction holds"""
+    return queryset.select_for_update(skip_locked=True, of=('self',)).filter(pk__gt=last_pk).order_by('pk')[:batch_size]
+
+
+def _batches(queryset, batch_size):
+    """
+    Lock and yield rows of queryset in id order, one transaction per batch.
+    Each batch seeks past the last id instead of offsetting, and rows another
+    transaction holds are skipped for the next sweep rather than waited on.
+    """
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(batch_query(queryset, last_pk, batch_size))
+            if not batch:
+                return
+            yield batch
+        last_pk = batch[-1].pk
+        if len(batch) < batch_size:
+            return
+
+
+def stale_payments(now):
+    """Payments unsettled for PAYMENT_TIMEOUT_MINUTES"""
+    cutoff = now - timedelta(minutes=settings.PAYMENT_TIMEOUT_MINUTES)
+    return Payment.objects.filter(status__in=UNSETTLED_PAYMENT_STATUSES, updated_at__lt=cutoff).only('id')
+
+
+def stale_bookings(now):
+    """Pending bookings older than BOOKING_PENDING_EXPIRY_HOURS with no payment settled or in flight"""
+    cutoff = now - timedelta(hours=settings.BOOKING_PENDING_EXPIRY_HOURS)
+    return Booking.objects.filter(status='pending', created_at__lt=cutoff).exclude(
+        payment__status__in=['processing', 'completed']
+    ).only('id', 'status', 'hostel_id', 'room_type_id')
+
+
+def fail_stale_payments(now=None, batch_size=500):
+    """Mark payments unsettled for PAYMENT_TIMEOUT_MINUTES as failed; returns how many were"""
+    now = now or timezone.now()
+    failed = 0
+    for batch in _batches(stale_payments(now), batch_size):
+        failed += Payment.objects.filter(pk__in=[payment.pk for payment in batch]).update(
+            status='failed', failure_reason=TIMED_OUT_REASON, updated_at=now
+        )
+    return failed
+
+
+def expire_stale_bookings(now=None, batch_size=500):
+    """
+    Expire pending bookings older than BOOKING_PENDING_EXPIRY_HOURS with no
+    payment settled or in flight, releasing their holds. Returns how many were.
+    """
+    now = now or timezone.now()
+    expired = 0
+    for batch in _batches(stale_bookings(now), batch_size):
+        apply_transition(batch, 'expired', None, EXPIRED_REASON)
+        expired += len(batch)
+    return expired
+
+
+def sweep_stale_reservations(batch_size=500):
+    """Fail abandoned payments first so the bookings behind them can expire in the same run"""
+    now = timezone.now()
+    return {
+        'payments_failed': fail_stale_payments(now, batch_size),
+        'bookings_expired': expire_stale_bookings(now, batch_size),
+    }
@@ -0,0 +1,15 @@
+from celery import shared_task
+from .inventory import release_expired_holds
+from .sweeper import sweep_stale_reservations
+
+
+@shared_task
+def release_expired_room_holds():
+    """Return rooms held by unpaid bookings past their hold expiry to inventory"""
+    return release_expired_holds()
+
+
+@shared_task
+def expire_stale_reservations():
+    """Expire pending bookings and fail payments nobody completed in time"""
+    return sweep_stale_reservations()
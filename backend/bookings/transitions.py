@@ -0,0 +1,65 @@
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from analytics.rollups import record_status_counts
+from .inventory import RELEASE_STATUSES, commit_holds, release_holds
+from .models import Booking, BookingStatusHistory
+
+# Status changes a bulk request may make; anything else is reported per booking
+ALLOWED_TRANSITIONS = {
+    'pending': {'confirmed', 'rejected', 'cancelled'},
+    'confirmed': {'completed', 'cancelled'},
+}
+
+MAX_BULK_BOOKINGS = 500
+
+
+def apply_transition(bookings, new_status, changed_by, reason=''):
+    """
+    Move bookings the caller has locked to new_status with one UPDATE and one
+    history insert, committing or releasing their room holds to match.
+    Returns the ids left unchanged because their room has sold out.
+    """
+    if not bookings:
+        return set()
+    sold_out = set()
+    if new_status == 'confirmed':
+        sold_out = commit_holds(bookings)
+    elif new_status in RELEASE_STATUSES:
+        release_holds([booking.pk for booking in bookings])
+
+    applied = [booking for booking in bookings if booking.pk not in sold_out]
+    Booking.objects.filter(pk__in=[booking.pk for booking in applied]).update(
+        status=new_status, updated_at=timezone.now()
+    )
+    BookingStatusHistory.objects.bulk_create([
+        BookingStatusHistory(booking_id=booking.pk, status=new_status, changed_by=changed_by, reason=reason)
+        for booking in applied
+    ])
+    record_status_counts(Counter(booking.hostel_id for booking in applied), new_status)
+    return sold_out
+
+
+def bulk_transition(user, booking_ids, new_status, reason=''):
+    """Validate and apply new_status to booking_ids in one transaction; returns {id: error message or None}"""
+    errors = {}
+    with transaction.atomic():
+        bookings = Booking.objects.select_for_update(of=('self',)).filter(pk__in=booking_ids).only(
+            'id', 'status', 'hostel_id', 'room_type_id'
+        )
+        if user.role == 'landlord':
+            bookings = bookings.filter(hostel__landlord=user)
+        found = {booking.pk: booking for booking in bookings}
+
+        eligible = []
+        for pk in booking_ids:
+            booking = found.get(pk)
+            if booking is None:
+                errors[pk] = 'Booking not found'
+            elif new_status not in ALLOWED_TRANSITIONS.get(booking.status, ()):
+                errors[pk] = f'Cannot change a {booking.status} booking to {new_status}'
+            else:
+                eligible.append(booking)
+        for pk in apply_transition(eligible, new_status, user, reason):
+            errors[pk] = 'No rooms of this type are left'
+    return {pk: errors.get(pk) for pk in booking_ids}
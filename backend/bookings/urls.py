@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('', views.BookingListCreateView.as_view(), name='booking-list-create'),
     path('<int:pk>/', views.BookingDetailView.as_view(), name='booking-detail'),
+    path('export/', views.export_bookings, name='export-bookings'),
+    path('bulk-status/', views.bulk_update_booking_status, name='bulk-update-booking-status'),
     path('<int:booking_id>/status/', views.update_booking_status, name='update-booking-status'),
     path('<int:booking_id>/history/', views.BookingStatusHistoryView.as_view(), name='booking-history'),
 ]
\ No newline at end of file
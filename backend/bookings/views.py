@@ -1,32 +1,41 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
+from core.exports import export_response
+from core.mixins import ConditionalRequestMixin, IdempotentCreateMixin
+from core.pagination import FeedPagination
+from hostels.cache import get_wishlist_ids
 from .models import Booking, BookingStatusHistory
-from .serializers import BookingSerializer, BookingCreateSerializer, BookingStatusHistorySerializer
+from .transitions import MAX_BULK_BOOKINGS, apply_transition, bulk_transition
+from .serializers import BookingSerializer, BookingListSerializer, BookingCreateSerializer, BookingStatusHistorySerializer
 
-class BookingListCreateView(generics.ListCreateAPIView):
+class BookingListCreateView(IdempotentCreateMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'hostel']
+    pagination_class = FeedPagination
     ordering = ['-created_at']
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return BookingCreateSerializer
-        return BookingSerializer
+        return BookingListSerializer
     
     def get_queryset(self):
         user = self.request.user
         if user.role == 'student':
-            return Booking.objects.filter(student=user)
+            queryset = Booking.objects.filter(student=user)
         elif user.role == 'landlord':
-            return Booking.objects.filter(hostel__landlord=user)
+            queryset = Booking.objects.filter(hostel__landlord=user)
         elif user.role in ['agent', 'admin']:
-            return Booking.objects.all()
-        return Booking.objects.none()
+            queryset = Booking.objects.all()
+        else:
+            queryset = Booking.objects.none()
+        return queryset.select_related('hostel', 'room_type', 'student').order_by('-created_at', '-id')
 
-class BookingDetailView(generics.RetrieveUpdateAPIView):
+class BookingDetailView(ConditionalRequestMixin, generics.RetrieveUpdateAPIView):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -39,45 +48,92 @@ class BookingDetailView(generics.RetrieveUpdateAPIView):
         elif user.role in ['agent', 'admin']:
             return Booking.objects.all()
         return Booking.objects.none()
+    
+    def get_validators(self):
+        user = self.request.user
+        row = self.get_queryset().filter(pk=self.kwargs['pk']).values(
+            'hostel', 'updated_at', 'hostel__updated_at', 'student__updated_at'
+        ).first()
+        if row is None:
+            return None
+        timestamps = [row['updated_at'], row['hostel__updated_at'], row['student__updated_at']]
+        # The nested hostel carries the caller's is_wishlisted flag, which no timestamp
+        # follows, so the representation is per-user and only the ETag is meaningful
+        return timestamps + [user.pk, row['hostel'] in get_wishlist_ids(user)], None
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def update_booking_status(request, booking_id):
     try:
-        booking = Booking.objects.get(id=booking_id)
-        
-        # Check permissions
-        if request.user.role == 'student' and booking.student != request.user:
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        elif request.user.role == 'landlord' and booking.hostel.landlord != request.user:
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        
         new_status = request.data.get('status')
         reason = request.data.get('reason', '')
         
         if new_status not in dict(Booking.STATUS_CHOICES):
             return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create status history
-        BookingStatusHistory.objects.create(
-            booking=booking,
-            status=new_status,
-            changed_by=request.user,
-            reason=reason
-        )
-        
-        booking.status = new_status
-        booking.save()
+        with transaction.atomic():
+            booking = Booking.objects.select_for_update(of=('self',)).select_related('hostel').get(id=booking_id)
+            
+            # Check permissions
+            if request.user.role == 'student' and booking.student_id != request.user.pk:
+                return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+            elif request.user.role == 'landlord' and booking.hostel.landlord_id != request.user.pk:
+                return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+            
+            if booking.status == new_status:
+                return Response({'message': 'Status updated successfully'})
+            if apply_transition([booking], new_status, request.user, reason):
+                return Response({'error': 'No rooms of this type are left'}, status=status.HTTP_409_CONFLICT)
         
         return Response({'message': 'Status updated successfully'})
         
     except Booking.DoesNotExist:
         return Response({'error': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_update_booking_status(request):
+    """Apply one status to a list of bookings; each id is reported as updated or with why it was skipped"""
+    if request.user.role not in ['landlord', 'agent', 'admin']:
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    booking_ids = request.data.get('ids')
+    new_status = request.data.get('status')
+    reason = request.data.get('reason', '')
+    if not isinstance(booking_ids, list) or not all(isinstance(pk, int) for pk in booking_ids):
+        return Response({'error': 'ids must be a list of booking ids'}, status=status.HTTP_400_BAD_REQUEST)
+    booking_ids = list(dict.fromkeys(booking_ids))
+    if not booking_ids or len(booking_ids) > MAX_BULK_BOOKINGS:
+        return Response({'error': f'Send between 1 and {MAX_BULK_BOOKINGS} ids'}, status=status.HTTP_400_BAD_REQUEST)
+    if new_status not in dict(Booking.STATUS_CHOICES):
+        return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    errors = bulk_transition(request.user, booking_ids, new_status, reason)
+    results = [
+        {'id': pk, 'updated': False, 'error': error} if error else {'id': pk, 'updated': True}
+        for pk, error in errors.items()
+    ]
+    return Response({
+        'status': new_status,
+        'updated': sum(1 for error in errors.values() if error is None),
+        'results': results,
+    })
+
 class BookingStatusHistoryView(generics.ListAPIView):
     serializer_class = BookingStatusHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         booking_id = self.kwargs['booking_id']
-        return BookingStatusHistory.objects.filter(booking_id=booking_id)
\ No newline at end of file
+        return BookingStatusHistory.objects.filter(booking_id=booking_id)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_bookings(request):
+    """Stream every booking as CSV or NDJSON (?output=) for reconciliation"""
+    if request.user.role not in ['agent', 'admin']:
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        return export_response(request, 'bookings')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
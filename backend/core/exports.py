@@ -0,0 +1,92 @@
+import csv
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+
+# Rows fetched per round trip; Postgres reads them through a server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Flat columns per exportable record type, and the lookup each filters its hostel by
+EXPORTS = {
+    'bookings': {
+        'model': 'bookings.Booking',
+        'hostel_field': 'hostel',
+        'fields': [
+            'id', 'status', 'student_id', 'student__username', 'student__email', 'hostel_id', 'hostel__name',
+            'room_type__type', 'check_in', 'check_out', 'guests', 'amount', 'service_fee', 'total_amount',
+            'payment_id', 'created_at', 'updated_at',
+        ],
+    },
+    'payments': {
+        'model': 'payments.Payment',
+        'hostel_field': 'booking__hostel',
+        'fields': [
+            'id', 'transaction_id', 'external_transaction_id', 'booking_id', 'booking__hostel_id', 'user_id',
+            'user__username', 'method', 'status', 'amount', 'phone_number', 'failure_reason', 'created_at',
+            'updated_at',
+        ],
+    },
+}
+
+
+class _Echo:
+    """File-like object whose write() hands back the line csv.writer produced"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(name, status=None, hostel=None, since=None, until=None):
+    """
+    Flat value tuples for an EXPORTS entry in id order, optionally narrowed by
+    status, hostel id and an inclusive created_at date range given as ISO
+    strings. Raises ValueError for a bad date.
+    """
+    export = EXPORTS[name]
+    queryset = apps.get_model(export['model']).objects.all()
+    if status:
+        queryset = queryset.filter(status=status)
+    if hostel:
+        queryset = queryset.filter(**{export['hostel_field']: hostel})
+    for lookup, value in [('created_at__date__gte', since), ('created_at__date__lte', until)]:
+        if value:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError('Dates must be in YYYY-MM-DD format')
+            queryset = queryset.filter(**{lookup: day})
+    return queryset.order_by('pk').values_list(*export['fields']).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def encode_rows(name, rows, output):
+    """Yield an export as CSV lines under a header row, or as one JSON object per line"""
+    fields = EXPORTS[name]['fields']
+    if output == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def export_response(request, name):
+    """Stream an export filtered by the request's query parameters; raises ValueError for bad ones"""
+    params = request.query_params
+    output = params.get('output', 'csv')
+    if output not in EXPORT_CONTENT_TYPES:
+        raise ValueError(f"output must be one of: {', '.join(EXPORT_CONTENT_TYPES)}")
+    rows = export_rows(
+        name, status=params.get('status'), hostel=params.get('hostel'), since=params.get('since'),
+        until=params.get('until')
+    )
+    response = StreamingHttpResponse(encode_rows(name, rows, output), content_type=EXPORT_CONTENT_TYPES[output])
+    response['Content-Disposition'] = f'attachment; filename="{name}.{output}"'
+    return response
@@ -0,0 +1,71 @@
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Widths (px) of the resized variants generated for every uploaded image
+VARIANT_WIDTHS = (320, 640, 1280)
+
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def build_variants(field_file, widths=VARIANT_WIDTHS):
+    """
+    Generate resized WebP and JPEG copies of an image next to the original.
+    Returns {width: {format: storage_name}}; widths wider than the source are skipped.
+    """
+    storage = field_file.storage
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+
+    with field_file.open('rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    variants = {}
+    for width in sorted(widths):
+        if width > original.width and variants:
+            break
+        resized = original.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        variants[str(width)] = {}
+        for extension, options in VARIANT_FORMATS.items():
+            image = resized
+            if options['format'] == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            elif image.mode not in ('RGB', 'RGBA', 'L'):
+                image = image.convert('RGBA')
+            buffer = BytesIO()
+            image.save(buffer, **options)
+            name = storage.save(
+                os.path.join(directory, 'variants', f'{stem}_{width}.{extension}'),
+                ContentFile(buffer.getvalue())
+            )
+            variants[str(width)][extension] = name
+    return variants
+
+
+def variant_names(variants):
+    return {name for formats in (variants or {}).values() for name in formats.values()}
+
+
+def delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def variant_urls(request, storage, variants, extension):
+    return {
+        width: request.build_absolute_uri(storage.url(formats[extension]))
+        for width, formats in (variants or {}).items()
+        if extension in formats
+    }
+
+
+def srcset(request, storage, variants, extension='webp'):
+    """HTML srcset string, e.g. 'https://.../a_320.webp 320w, https://.../a_640.webp 640w'"""
+    urls = variant_urls(request, storage, variants, extension)
+    return ', '.join(f'{url} {width}w' for width, url in sorted(urls.items(), key=lambda item: int(item[0])))
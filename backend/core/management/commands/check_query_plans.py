@@ -0,0 +1,156 @@
+import re
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from bookings.models import Booking
+from bookings.sweeper import batch_query, stale_bookings, stale_payments
+from bookings.views import BookingListCreateView
+from hostels.models import Hostel, RoomType
+from hostels.views import HostelListCreateView
+from notifications.models import Notification
+from notifications.views import NotificationListView
+from payments.models import MPesaTransaction, Payment
+from payments.views import PaymentListView
+from reviews.models import Review
+from reviews.views import HostelReviewsView, ReviewListCreateView
+
+User = get_user_model()
+
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on "?(\w+)"?'),
+    # SCAN without USING [COVERING] INDEX reads the whole table
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+}
+
+
+def list_query(view_class, user, params=None, **kwargs):
+    """The first page a list view would query for user, built by the view's own queryset and filter backends"""
+    request = Request(RequestFactory().get('/', params or {}))
+    request.user = user
+    view = view_class(request=request, args=(), kwargs=kwargs, format_kwarg=None)
+    return view.filter_queryset(view.get_queryset())[:api_settings.PAGE_SIZE]
+
+
+def hot_queries(student, hostel):
+    """(label, queryset) for the main query behind each hot endpoint"""
+    agent = User(role='agent')
+    now = timezone.now()
+    return [
+        ('student booking list', list_query(BookingListCreateView, student)),
+        ('agent booking list', list_query(BookingListCreateView, agent)),
+        ('hostel bookings by status', list_query(BookingListCreateView, agent, {'hostel': hostel, 'status': 'pending'})),
+        ('stale booking sweep', batch_query(stale_bookings(now), 0, 500)),
+        ('notification list', list_query(NotificationListView, student)),
+        # The unread count and callback lookup are inline in function views; these match them
+        ('unread notification count', Notification.objects.filter(user=student, read=False)),
+        ('payment list', list_query(PaymentListView, student)),
+        ('abandoned payment sweep', batch_query(stale_payments(now), 0, 500)),
+        ('mpesa callback lookup', MPesaTransaction.objects.filter(checkout_request_id='ws_CO_0')),
+        ('hostel reviews', list_query(HostelReviewsView, AnonymousUser(), hostel_id=hostel)),
+        ('review list', list_query(ReviewListCreateView, AnonymousUser())),
+        ('hostel list', list_query(HostelListCreateView, AnonymousUser())),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the main query of each hot endpoint and fail if any sequentially scans a large table'
+
+    def add_arguments(self, parser):
+        # Below tens of thousands of rows SQLite's planner picks an index for almost anything,
+        # so a smaller seed could not catch a missing one
+        parser.add_argument('--seed', type=int, default=50000,
+                            help='Insert this many bookings (and matching rows elsewhere) first; rolled back '
+                                 'afterwards. 0 checks the current data')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Tables with fewer rows may be scanned')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'Query plans cannot be checked on {connection.vendor}')
+
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['seed'])
+            failures = self.check_plans(pattern, options['min_rows'])
+            # Seeded rows are only there to give the planner realistic statistics
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('Sequential scans on large tables:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('No sequential scans on large tables'))
+
+    def check_plans(self, pattern, min_rows):
+        booking = Booking.objects.select_related('student').first()
+        if booking is None:
+            raise CommandError('There are no bookings to plan against; pass --seed')
+        student, hostel = booking.student, booking.hostel_id
+
+        tables = {model._meta.db_table: model for model in [Booking, Hostel, Notification, Payment, MPesaTransaction, Review]}
+        large = {table for table, model in tables.items() if model.objects.count() >= min_rows}
+        # Fresh statistics, so the plans reflect the current (or seeded) row counts
+        with connection.cursor() as cursor:
+            for table in large:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+
+        failures = []
+        for label, queryset in hot_queries(student, hostel):
+            plan = queryset.explain()
+            scanned = sorted(set(pattern.findall(plan)) & large)
+            self.stdout.write(f"{label}: {'seq scan on ' + ', '.join(scanned) if scanned else 'ok'}")
+            if self.verbosity > 1:
+                self.stdout.write(plan)
+            if scanned:
+                failures.append(f"{label}: {', '.join(scanned)}")
+        return failures
+
+    def seed(self, count):
+        """Bulk insert count bookings, each with a payment, M-Pesa transaction and notification, plus reviews"""
+        people = max(count // 20, 1)
+        landlord = User.objects.create(username='plan-check-landlord', role='landlord')
+        students = User.objects.bulk_create([
+            User(username=f'plan-check-student-{index}', role='student') for index in range(people)
+        ])
+        hostels = Hostel.objects.bulk_create([
+            Hostel(name=f'Plan check {index}', description='', price=5000, location='', university='',
+                   landlord=landlord, available=index % 10 != 0)
+            for index in range(people)
+        ])
+        room_types = RoomType.objects.bulk_create([
+            RoomType(hostel=hostel, type='Single', price=5000, available=1, total=1) for hostel in hostels
+        ])
+
+        start = date.today()
+        bookings = Booking.objects.bulk_create([
+            Booking(student=students[index % people], hostel=hostels[index % people], room_type=room_types[index % people],
+                    check_in=start + timedelta(days=index % 365), check_out=start + timedelta(days=index % 365 + 30),
+                    amount=5000, service_fee=125, total_amount=5125,
+                    status=['pending', 'confirmed', 'cancelled', 'completed'][index % 4])
+            for index in range(count)
+        ], batch_size=1000)
+        payments = Payment.objects.bulk_create([
+            Payment(booking=booking, user_id=booking.student_id, amount=booking.total_amount, method='mpesa',
+                    status='completed', transaction_id=f'plan-check-{booking.pk}')
+            for booking in bookings
+        ], batch_size=1000)
+        MPesaTransaction.objects.bulk_create([
+            MPesaTransaction(payment=payment, merchant_request_id='', checkout_request_id=f'ws_CO_{payment.pk}',
+                             phone_number='', amount=payment.amount, account_reference='', transaction_desc='')
+            for payment in payments
+        ], batch_size=1000)
+        Notification.objects.bulk_create([
+            Notification(user=students[index % people], title='', message='', read=index % 3 == 0)
+            for index in range(count)
+        ], batch_size=1000)
+        # One review per (hostel, student) pair, as the unique constraint allows
+        Review.objects.bulk_create([
+            Review(hostel=hostels[index % people], user=students[(index // people + index) % people], rating=4, comment='')
+            for index in range(min(count, people * people))
+        ], batch_size=1000)
@@ -0,0 +1,33 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from core.exports import EXPORT_CONTENT_TYPES, EXPORTS, encode_rows, export_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream bookings or payments as CSV or NDJSON to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('records', choices=list(EXPORTS))
+        parser.add_argument('--output', choices=list(EXPORT_CONTENT_TYPES), default='csv')
+        parser.add_argument('--file', help='Write here instead of stdout')
+        parser.add_argument('--status')
+        parser.add_argument('--hostel', type=int)
+        parser.add_argument('--since', help='First created_at date to include (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Last created_at date to include (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            rows = export_rows(
+                options['records'], status=options['status'], hostel=options['hostel'], since=options['since'],
+                until=options['until']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        stream = open(options['file'], 'w', newline='', encoding='utf-8') if options['file'] else sys.stdout
+        try:
+            for chunk in encode_rows(options['records'], rows, options['output']):
+                stream.write(chunk)
+        finally:
+            if options['file']:
+                stream.close()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+# An unfinished key older than this is taken to belong to a crashed worker
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+
+class ConditionalRequestMixin:
+    """
+    Answer conditional requests from cheap validators instead of the serializer.
+
+    Views implement get_validators() returning (etag_parts, last_modified) for
+    the requested object, or None when it is not visible to the caller. GETs
+    with a matching If-None-Match / If-Modified-Since get a 304, and PUT/PATCH
+    with a stale If-Match get a 412, before the object is loaded. The ETag
+    also covers ?fields= and ?expand=, which change the representation.
+    """
+    projection_params = ('fields', 'expand')
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def conditional_headers(self):
+        validators = self.get_validators()
+        if validators is None:
+            return None, None
+        etag_parts, last_modified = validators
+        projection = [self.request.query_params.get(param, '') for param in self.projection_params]
+        raw = '|'.join(str(part) for part in [*etag_parts, *projection])
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        return etag, last_modified
+
+    def set_conditional_headers(self, response, etag, last_modified):
+        if etag and (response.status_code == 304 or 200 <= response.status_code < 300):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def evaluate_preconditions(self, request):
+        etag, last_modified = self.conditional_headers()
+        if etag is None:
+            return None, None, None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        short_circuit = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if short_circuit is not None:
+            return self.set_conditional_headers(short_circuit, etag, last_modified), etag, last_modified
+        return None, etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        short_circuit, etag, last_modified = self.evaluate_preconditions(request)
+        if short_circuit is not None:
+            return short_circuit
+        return self.set_conditional_headers(super().get(request, *args, **kwargs), etag, last_modified)
+
+    def put(self, request, *args, **kwargs):
+        short_circuit, _, _ = self.evaluate_preconditions(request)
+        if short_circuit is not None:
+            return short_circuit
+        response = super().put(request, *args, **kwargs)
+        return self.set_conditional_headers(response, *self.conditional_headers())
+
+    def patch(self, request, *args, **kwargs):
+        short_circuit, _, _ = self.evaluate_preconditions(request)
+        if short_circuit is not None:
+            return short_circuit
+        response = super().patch(request, *args, **kwargs)
+        return self.set_conditional_headers(response, *self.conditional_headers())
+
+
+class IdempotentCreateMixin:
+    """
+    Honour an Idempotency-Key header on POST. The first request with a key
+    runs and, if it succeeds, its response is stored in the same transaction
+    as whatever it created; retries with the same key and body get that
+    response back instead of running again. Reusing a key for a different
+    body is rejected, as is a retry that arrives while the first is running.
+    """
+    idempotency_header = 'Idempotency-Key'
+
+    def claim_idempotency_key(self, request, key):
+        """Returns (record to fill in, None) for the first request, or (None, response) otherwise"""
+        request_hash = hashlib.sha256(json.dumps(request.data, sort_keys=True, default=str).encode()).hexdigest()
+        lookup = {'user': request.user, 'scope': f'{request.method} {request.path}', 'key': key}
+        for _ in range(2):
+            try:
+                with transaction.atomic():
+                    return IdempotencyKey.objects.create(request_hash=request_hash, **lookup), None
+            except IntegrityError:
+                record = IdempotencyKey.objects.filter(**lookup).first()
+            if record is not None:
+                break
+        else:
+            return None, Response({'error': 'Request with this Idempotency-Key is in progress'}, status=status.HTTP_409_CONFLICT)
+
+        if record.request_hash != request_hash:
+            return None, Response(
+                {'error': 'Idempotency-Key was already used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if record.status_code is not None:
+            response = Response(record.response_body, status=record.status_code)
+            response['Idempotent-Replayed'] = 'true'
+            return None, response
+        stale = timezone.now() - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+        if IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True, created_at__lt=stale).update(
+            created_at=timezone.now()
+        ):
+            return record, None
+        return None, Response({'error': 'Request with this Idempotency-Key is in progress'}, status=status.HTTP_409_CONFLICT)
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key or not request.user.is_authenticated:
+            return super().post(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': 'Idempotency-Key is too long'}, status=status.HTTP_400_BAD_REQUEST)
+
+        record, response = self.claim_idempotency_key(request, key)
+        if response is not None:
+            return response
+        try:
+            with transaction.atomic():
+                response = super().post(request, *args, **kwargs)
+                if 200 <= response.status_code < 300:
+                    record.status_code = response.status_code
+                    record.response_body = response.data
+                    record.save(update_fields=['status_code', 'response_body'])
+        except Exception:
+            record.delete()
+            raise
+        if record.status_code is None:
+            # Failures are not stored, so the client can retry with the same key
+            record.delete()
+        return response
\ No newline at end of file
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 class CompanyInfo(models.Model):
@@ -27,4 +29,24 @@ class TeamMember(models.Model):
         ordering = ['order', 'created_at']
     
     def __str__(self):
-        return f"{self.name} - {self.role}"
\ No newline at end of file
+        return f"{self.name} - {self.role}"
+
+class IdempotencyKey(models.Model):
+    """Outcome of a POST sent with an Idempotency-Key header, replayed when the client retries"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=200)
+    request_hash = models.CharField(max_length=64)
+    # Null while the first request is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['user', 'scope', 'key']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} {self.scope} {self.key}"
\ No newline at end of file
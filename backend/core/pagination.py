@@ -0,0 +1,51 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Keyset pagination over -created_at with the primary key as a tiebreaker"""
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # The cursor encodes a position in this fixed ordering; FeedPagination
+        # never uses it for requests that ask for a different one
+        return self.ordering
+
+
+class FeedPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the client opts in to cursor pagination with
+    ?pagination=cursor. Cursor pages carry next/previous links (which keep the
+    opt-in) but no count, and cost the same however deep the client scrolls.
+    Requests that order the results themselves (?ordering=, ?search= relevance,
+    ?near= distance) stay on page numbers, since the cursor only follows
+    -created_at.
+    """
+    mode_param = 'pagination'
+    cursor_pagination_class = CreatedAtCursorPagination
+    ordering_params = ('ordering', 'search', 'near')
+
+    def use_cursor(self, request):
+        cursor_paginator = self.cursor_pagination_class
+        if any(request.query_params.get(param) for param in self.ordering_params):
+            return False
+        return (
+            request.query_params.get(self.mode_param) == 'cursor'
+            or cursor_paginator.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
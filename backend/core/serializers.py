@@ -11,4 +11,48 @@ class TeamMemberSerializer(serializers.ModelSerializer):
     class Meta:
         model = TeamMember
         fields = ['id', 'name', 'role', 'bio', 'image', 'order', 'active', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+def requested_fields(request, path=''):
+    """
+    Field names requested for the serializer at path via ?fields= and ?expand=,
+    or None when every field should be rendered. Dotted names address nested
+    serializers, e.g. ?fields=id,hostel.name&expand=hostel.images.
+    """
+    if request is None:
+        return None
+    fields = {name.strip() for name in request.query_params.get('fields', '').split(',') if name.strip()}
+    if not fields:
+        return None
+    expand = {name.strip() for name in request.query_params.get('expand', '').split(',') if name.strip()}
+    prefix = f'{path}.' if path else ''
+    selected = {
+        name[len(prefix):].split('.')[0]
+        for name in fields | expand
+        if name.startswith(prefix)
+    }
+    if path and not selected:
+        # The parent asked for this relation as a whole
+        return None
+    return selected
+
+
+class DynamicFieldsMixin:
+    """Render only the fields selected with ?fields= / ?expand= (see requested_fields)"""
+
+    @property
+    def field_path(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(parts))
+
+    def get_field_names(self, declared_fields, info):
+        names = super().get_field_names(declared_fields, info)
+        selected = requested_fields(self.context.get('request'), self.field_path)
+        if selected is None:
+            return names
+        return [name for name in names if name in selected]
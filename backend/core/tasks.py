@@ -0,0 +1,13 @@
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from .models import IdempotencyKey
+
+
+@shared_task
+def prune_idempotency_keys():
+    """Forget Idempotency-Key outcomes older than IDEMPOTENCY_KEY_TTL_HOURS"""
+    cutoff = timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Hostel, HostelImage, RoomType, Wishlist
+from .models import Amenity, Hostel, HostelImage, RoomType, Wishlist
 
 @admin.register(Hostel)
 class HostelAdmin(admin.ModelAdmin):
@@ -7,6 +7,12 @@ class HostelAdmin(admin.ModelAdmin):
     list_filter = ['verified', 'available', 'university', 'created_at']
     search_fields = ['name', 'location', 'university']
     list_editable = ['verified', 'available']
+    readonly_fields = ['rating_sum', 'review_count', 'average_rating']
+
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name', 'slug']
 
 @admin.register(HostelImage)
 class HostelImageAdmin(admin.ModelAdmin):
@@ -0,0 +1,103 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from .models import Wishlist
+
+LIST_VERSION_KEY = 'hostels:list:version'
+
+# Wishlist id sets are invalidated explicitly; the timeout only bounds drift from admin edits
+WISHLIST_IDS_TIMEOUT = 60 * 60 * 24
+
+# Query parameters whose comma separated values are order-insensitive
+SET_PARAMS = {'amenities', 'fields', 'expand'}
+
+
+def detail_version_key(hostel_id):
+    return f'hostels:detail:{hostel_id}:version'
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never repeats an earlier one
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_hostel(hostel_id=None):
+    """Expire cached hostel lists, and the cached detail of hostel_id if given"""
+    bump_version(LIST_VERSION_KEY)
+    if hostel_id is not None:
+        bump_version(detail_version_key(hostel_id))
+
+
+def wishlist_ids_key(user_id):
+    return f'hostels:wishlist:{user_id}:ids'
+
+
+def get_wishlist_ids(user):
+    """Set of hostel ids the user has wishlisted, from the cache or one indexed query"""
+    if not user.is_authenticated:
+        return frozenset()
+    key = wishlist_ids_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Wishlist.objects.filter(user=user).values_list('hostel_id', flat=True))
+        cache.set(key, ids, WISHLIST_IDS_TIMEOUT)
+    return ids
+
+
+def invalidate_wishlist(user_id):
+    cache.delete(wishlist_ids_key(user_id))
+
+
+def normalized_params(query_params):
+    params = []
+    for key in sorted(query_params):
+        for value in sorted(query_params.getlist(key)):
+            value = value.strip()
+            if key in SET_PARAMS:
+                value = ','.join(sorted({part.strip().lower() for part in value.split(',') if part.strip()}))
+            if value:
+                params.append((key, value))
+    return urlencode(params)
+
+
+def response_cache_key(request, version_key):
+    raw = f'{request.get_host()}{request.path}?{normalized_params(request.query_params)}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'hostels:response:{get_version(version_key)}:{digest}'
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Serve anonymous GETs from the cache. Keys embed a version that
+    invalidate_hostel() bumps whenever listing data changes, so stale entries
+    are never read and simply expire.
+    """
+
+    def get_cache_version_key(self):
+        raise NotImplementedError
+
+    def cached_response(self, render, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return render(request, *args, **kwargs)
+        key = response_cache_key(request, self.get_cache_version_key())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = render(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.HOSTEL_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from django.db.models import Case, CharField, Count, Q, Value, When
+from .models import HostelAmenity
+
+# (key, lower bound inclusive, upper bound exclusive) in KES per month
+PRICE_BUCKETS = [
+    ('under_5000', None, 5000),
+    ('5000_10000', 5000, 10000),
+    ('10000_15000', 10000, 15000),
+    ('15000_20000', 15000, 20000),
+    ('20000_plus', 20000, None),
+]
+
+
+def price_bucket_expression():
+    whens = []
+    for key, lower, upper in PRICE_BUCKETS:
+        condition = Q()
+        if lower is not None:
+            condition &= Q(price__gte=lower)
+        if upper is not None:
+            condition &= Q(price__lt=upper)
+        whens.append(When(condition, then=Value(key)))
+    return Case(*whens, output_field=CharField())
+
+
+def compute_facets(queryset):
+    """
+    Facet counts for an already filtered hostel queryset: one grouped pass
+    over (university, verified, price bucket) plus one over amenity links.
+    """
+    groups = queryset.order_by().annotate(
+        price_bucket=price_bucket_expression()
+    ).values('university', 'verified', 'price_bucket').annotate(count=Count('id'))
+
+    universities = defaultdict(int)
+    verified = {'true': 0, 'false': 0}
+    prices = {key: 0 for key, _, _ in PRICE_BUCKETS}
+    total = 0
+    for group in groups:
+        count = group['count']
+        total += count
+        universities[group['university']] += count
+        verified['true' if group['verified'] else 'false'] += count
+        if group['price_bucket']:
+            prices[group['price_bucket']] += count
+
+    amenities = HostelAmenity.objects.filter(
+        hostel__in=queryset.order_by().values('pk')
+    ).values('amenity__slug', 'amenity__name').annotate(count=Count('hostel')).order_by('-count', 'amenity__slug')
+
+    return {
+        'total': total,
+        'university': [
+            {'value': name, 'count': count}
+            for name, count in sorted(universities.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'price': [
+            {'value': key, 'min': lower, 'max': upper, 'count': prices[key]}
+            for key, lower, upper in PRICE_BUCKETS
+        ],
+        'amenities': [
+            {'value': row['amenity__slug'], 'label': row['amenity__name'], 'count': row['count']}
+            for row in amenities
+        ],
+        'verified': verified,
+    }
@@ -1,5 +1,12 @@
 import django_filters
-from .models import Hostel
+from django.db.models import Count
+from django.utils.text import slugify
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter, SearchFilter
+from bookings.availability import hostels_available_between, parse_window
+from .geo import nearby
+from .models import Hostel, HostelAmenity
+from .search import search_hostels
 
 class HostelFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(field_name="price", lookup_expr='gte')
@@ -8,14 +15,61 @@ class HostelFilter(django_filters.FilterSet):
     location = django_filters.CharFilter(field_name="location", lookup_expr='icontains')
     verified = django_filters.BooleanFilter(field_name="verified")
     amenities = django_filters.CharFilter(method='filter_amenities')
+    available_between = django_filters.CharFilter(method='filter_available_between')
     
     class Meta:
         model = Hostel
-        fields = ['min_price', 'max_price', 'university', 'location', 'verified', 'amenities']
+        fields = ['min_price', 'max_price', 'university', 'location', 'verified', 'amenities', 'available_between']
     
     def filter_amenities(self, queryset, name, value):
-        if value:
-            amenities_list = [amenity.strip() for amenity in value.split(',')]
-            for amenity in amenities_list:
-                queryset = queryset.filter(amenities__icontains=amenity)
+        slugs = {slugify(amenity) for amenity in value.split(',')} - {''}
+        if not slugs:
+            return queryset
+        # Hostels linked to every requested amenity, resolved over the (amenity, hostel) index
+        matching = HostelAmenity.objects.filter(amenity__slug__in=slugs).values('hostel').annotate(
+            matched=Count('amenity')
+        ).filter(matched=len(slugs)).values('hostel')
+        return queryset.filter(pk__in=matching)
+    
+    def filter_available_between(self, queryset, name, value):
+        try:
+            start, end = parse_window(*value.split(','))
+        except (TypeError, ValueError) as exc:
+            message = str(exc) if isinstance(exc, ValueError) else 'Expected available_between=<start>,<end>'
+            raise ValidationError({name: message})
+        return hostels_available_between(queryset, start, end)
+
+class HostelSearchFilter(SearchFilter):
+    """Ranked full-text search; results are ordered by relevance unless ?ordering= is given"""
+    
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        queryset = search_hostels(queryset, text)
+        if not request.query_params.get(OrderingFilter.ordering_param):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
+
+class HostelNearbyFilter(BaseFilterBackend):
+    """?near=lat,lng&radius_km= filtering; results are ordered by distance unless ?ordering= is given"""
+    near_param = 'near'
+    radius_param = 'radius_km'
+    default_radius_km = 5
+    max_radius_km = 100
+    
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get(self.near_param)
+        if not near:
+            return queryset
+        try:
+            latitude, longitude = (float(part) for part in near.split(','))
+            radius_km = float(request.query_params.get(self.radius_param, self.default_radius_km))
+        except ValueError:
+            raise ValidationError({self.near_param: 'Expected near=<latitude>,<longitude> and a numeric radius_km'})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius_km <= 0:
+            raise ValidationError({self.near_param: 'Coordinates or radius out of range'})
+        queryset = nearby(queryset, latitude, longitude, min(radius_km, self.max_radius_km))
+        if not request.query_params.get(OrderingFilter.ordering_param):
+            queryset = queryset.order_by('distance_km', '-created_at')
         return queryset
\ No newline at end of file
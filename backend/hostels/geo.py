@@ -0,0 +1,40 @@
+import math
+from django.db.models import FloatField
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LATITUDE = 111.32
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Coordinate ranges enclosing the circle, used as an indexed prefilter"""
+    lat_delta = radius_km / KM_PER_DEGREE_LATITUDE
+    lng_delta = radius_km / (KM_PER_DEGREE_LATITUDE * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        (max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)),
+        (max(longitude - lng_delta, -180.0), min(longitude + lng_delta, 180.0)),
+    )
+
+
+def distance_km_expression(latitude, longitude):
+    """Haversine distance from (latitude, longitude) to each row, evaluated by the database"""
+    row_lat = Radians(Cast('latitude', FloatField()))
+    row_lng = Radians(Cast('longitude', FloatField()))
+    origin_lat = math.radians(latitude)
+    origin_lng = math.radians(longitude)
+    a = (
+        Power(Sin((row_lat - origin_lat) / 2), 2)
+        + math.cos(origin_lat) * Cos(row_lat) * Power(Sin((row_lng - origin_lng) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def nearby(queryset, latitude, longitude, radius_km):
+    """Restrict to rows within radius_km and annotate distance_km"""
+    lat_range, lng_range = bounding_box(latitude, longitude, radius_km)
+    return queryset.filter(
+        latitude__range=lat_range,
+        longitude__range=lng_range
+    ).annotate(
+        distance_km=distance_km_expression(latitude, longitude)
+    ).filter(distance_km__lte=radius_km)
@@ -0,0 +1,215 @@
+import codecs
+import csv
+import json
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from rest_framework import serializers
+from accounts.models import User
+from .cache import invalidate_hostel
+from .models import Amenity, Hostel, HostelAmenity, RoomType
+from .search import search_index
+from .serializers import RoomTypeSerializer
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+
+class ImportRoomTypeSerializer(RoomTypeSerializer):
+    def validate(self, attrs):
+        if attrs.get('available', 0) > attrs.get('total', 0):
+            raise serializers.ValidationError({'available': ['Cannot be more than total']})
+        return attrs
+
+
+class HostelImportRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    location = serializers.CharField(max_length=200)
+    university = serializers.CharField(max_length=100)
+    amenities = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6, required=False, allow_null=True)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6, required=False, allow_null=True)
+    room_types = ImportRoomTypeSerializer(many=True, required=False, default=list)
+    landlord = serializers.CharField(required=False, allow_blank=True)
+
+
+def detect_format(filename, default='csv'):
+    extension = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    return default
+
+
+def _normalize_csv_row(row):
+    """CSV cells are strings; decode the list-valued columns and drop empty cells"""
+    row = {key: value for key, value in row.items() if key and value not in (None, '')}
+    amenities = row.get('amenities')
+    if amenities is not None:
+        if amenities.lstrip().startswith('['):
+            row['amenities'] = json.loads(amenities)
+        else:
+            row['amenities'] = [amenity.strip() for amenity in amenities.split(',') if amenity.strip()]
+    if 'room_types' in row:
+        row['room_types'] = json.loads(row['room_types'])
+    return row
+
+
+def _decode_lines(fileobj, bad_lines):
+    """
+    Decode a binary stream one line at a time. Lines that are not UTF-8 are
+    decoded with replacement characters and their numbers added to bad_lines,
+    so one bad byte costs only the row it is in.
+    """
+    for number, raw in enumerate(fileobj, start=1):
+        if number == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode('utf-8')
+        except UnicodeDecodeError:
+            bad_lines.append(number)
+            yield raw.decode('utf-8', errors='replace')
+
+
+NOT_UTF8_ERROR = 'Row is not UTF-8 encoded; save the file as UTF-8'
+
+
+def iter_rows(fileobj, file_format):
+    """Yield (row_number, dict) from a binary CSV or JSONL stream without reading it all into memory"""
+    bad_lines = []
+    lines = _decode_lines(fileobj, bad_lines)
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        # A quoted cell can span lines, so check every line the reader took for this row
+        last_line = reader.line_num if reader.fieldnames else 0
+        for number, row in enumerate(reader, start=1):
+            if bad_lines and bad_lines[-1] > last_line:
+                yield number, ValueError(NOT_UTF8_ERROR)
+            else:
+                try:
+                    yield number, _normalize_csv_row(row)
+                except ValueError as exc:
+                    yield number, exc
+            last_line = reader.line_num
+    else:
+        for number, line in enumerate(lines, start=1):
+            if bad_lines and bad_lines[-1] == number:
+                yield number, ValueError(NOT_UTF8_ERROR)
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                yield number, exc
+
+
+class HostelImporter:
+    """
+    Validate and insert hostels (with room types and amenities) in batches.
+    Each batch is written with bulk_create inside its own transaction; rows
+    that fail validation are reported and skipped.
+    """
+
+    def __init__(self, user, batch_size=500):
+        self.user = user
+        self.batch_size = batch_size
+        self.can_assign_landlord = user.is_staff or user.role in ('agent', 'admin')
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows):
+        batch = []
+        for number, row in rows:
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        if self.created:
+            search_index.reset()
+            transaction.on_commit(invalidate_hostel)
+        return {'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+    def resolve_landlords(self, valid):
+        names = {data['landlord'] for _, data in valid if data.get('landlord')}
+        if not names:
+            return {}
+        if not self.can_assign_landlord:
+            # Landlords may only name themselves
+            return {self.user.username: self.user, str(self.user.pk): self.user}
+        ids = {name for name in names if name.isdigit()}
+        landlords = User.objects.filter(Q(username__in=names) | Q(pk__in=ids), role='landlord')
+        resolved = {}
+        for landlord in landlords:
+            resolved[landlord.username] = landlord
+            resolved[str(landlord.pk)] = landlord
+        return resolved
+
+    def import_batch(self, batch):
+        valid = []
+        for number, row in batch:
+            if isinstance(row, Exception) or not isinstance(row, dict):
+                self.errors.append({'row': number, 'errors': {'non_field_errors': [f'Unreadable row: {row}']}})
+                continue
+            serializer = HostelImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                self.errors.append({'row': number, 'errors': serializer.errors})
+
+        landlords = self.resolve_landlords(valid)
+        hostels, room_types = [], []
+        for number, data in valid:
+            data = dict(data)
+            landlord_name = data.pop('landlord', '')
+            landlord = self.user
+            if landlord_name:
+                landlord = landlords.get(landlord_name)
+                if landlord is None:
+                    message = 'Unknown landlord' if self.can_assign_landlord else 'Only agents and admins can assign a landlord'
+                    self.errors.append({'row': number, 'errors': {'landlord': [message]}})
+                    continue
+            room_types.append(data.pop('room_types'))
+            hostel = Hostel(landlord=landlord, **data)
+            hostel.search_document = hostel.build_search_document()
+            hostels.append((number, hostel))
+        if not hostels:
+            return
+
+        try:
+            with transaction.atomic():
+                created = Hostel.objects.bulk_create([hostel for _, hostel in hostels])
+                RoomType.objects.bulk_create([
+                    RoomType(hostel=hostel, **room_data)
+                    for hostel, rooms in zip(created, room_types)
+                    for room_data in rooms
+                ])
+                self.link_amenities(created)
+        except DatabaseError as exc:
+            for number, _ in hostels:
+                self.errors.append({'row': number, 'errors': {'non_field_errors': [f'Batch failed: {exc}']}})
+            return
+        self.created += len(created)
+
+    def link_amenities(self, hostels):
+        names = {}
+        for hostel in hostels:
+            for amenity in hostel.amenities:
+                names.setdefault(slugify(amenity), amenity)
+        names.pop('', None)
+        if not names:
+            return
+        Amenity.objects.bulk_create(
+            [Amenity(slug=slug, name=name) for slug, name in names.items()],
+            ignore_conflicts=True
+        )
+        amenity_ids = dict(Amenity.objects.filter(slug__in=names).values_list('slug', 'id'))
+        HostelAmenity.objects.bulk_create([
+            HostelAmenity(hostel=hostel, amenity_id=amenity_id)
+            for hostel in hostels
+            for amenity_id in {amenity_ids[slugify(a)] for a in hostel.amenities if slugify(a) in amenity_ids}
+        ])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from accounts.models import User
+from accounts.tasks import process_avatar
+from hostels.models import HostelImage
+from hostels.tasks import process_hostel_image
+
+
+class Command(BaseCommand):
+    help = 'Queue thumbnail/WebP generation for hostel images and avatars that have no variants yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate variants for every image')
+
+    def handle(self, *args, **options):
+        images = HostelImage.objects.exclude(image='')
+        users = User.objects.exclude(avatar='').exclude(avatar__isnull=True)
+        if not options['all']:
+            images = images.filter(variants={})
+            users = users.filter(avatar_variants={})
+
+        image_count = 0
+        for image_id in images.values_list('pk', flat=True).iterator():
+            process_hostel_image.delay(image_id)
+            image_count += 1
+        avatar_count = 0
+        for user_id, avatar_name in users.values_list('pk', 'avatar').iterator():
+            process_avatar.delay(user_id, avatar_name)
+            avatar_count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Queued {image_count} hostel images and {avatar_count} avatars'
+        ))
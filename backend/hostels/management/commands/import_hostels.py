@@ -0,0 +1,32 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from hostels.importers import IMPORT_FORMATS, HostelImporter, detect_format, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import hostels with room types from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Username of the landlord, agent or admin performing the import')
+        parser.add_argument('--file-format', choices=IMPORT_FORMATS)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+        if user.role not in ['landlord', 'agent', 'admin'] and not user.is_staff:
+            raise CommandError(f"User {options['user']} is not a landlord, agent or admin")
+
+        file_format = options['file_format'] or detect_format(options['path'])
+        with open(options['path'], 'rb') as fileobj:
+            summary = HostelImporter(user, batch_size=options['batch_size']).run(iter_rows(fileobj, file_format))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} hostels, {summary['failed']} rows failed"
+        ))
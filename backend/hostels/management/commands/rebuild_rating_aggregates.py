@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from hostels.models import Hostel
+from reviews.models import Review
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored rating sum, count and average for every hostel'
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.filter(hostel=OuterRef('pk')).order_by().values('hostel')
+        rating_sum = reviews.annotate(total=Sum('rating')).values('total')
+        review_count = reviews.annotate(total=Count('id')).values('total')
+
+        with transaction.atomic():
+            updated = Hostel.objects.update(
+                rating_sum=Coalesce(Subquery(rating_sum, output_field=IntegerField()), 0),
+                review_count=Coalesce(Subquery(review_count, output_field=IntegerField()), 0)
+            )
+            Hostel.objects.update(average_rating=Hostel.average_rating_expression())
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates for {updated} hostels'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from hostels.models import Hostel
+from hostels.search import ensure_search_index, search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored search document for every hostel and ensure the search index exists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+        for hostel in Hostel.objects.only(
+            'pk', 'name', 'location', 'university', 'description', 'amenities'
+        ).iterator(chunk_size=batch_size):
+            hostel.search_document = hostel.build_search_document()
+            batch.append(hostel)
+            if len(batch) >= batch_size:
+                updated += Hostel.objects.bulk_update(batch, ['search_document'])
+                batch = []
+        if batch:
+            updated += Hostel.objects.bulk_update(batch, ['search_document'])
+
+        ensure_search_index()
+        search_index.reset()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search documents for {updated} hostels'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from hostels.similarity import rebuild_similar_hostels
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored similar-hostel lists for hostels changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every hostel\'s list')
+
+    def handle(self, *args, **options):
+        written = rebuild_similar_hostels(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt similar hostels for {written} hostels'))
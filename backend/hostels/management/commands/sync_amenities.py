@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import slugify
+from hostels.models import Amenity, Hostel, HostelAmenity
+
+
+class Command(BaseCommand):
+    help = 'Backfill the amenity catalogue and HostelAmenity links from the amenities JSON field'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        hostels = Hostel.objects.values_list('pk', 'amenities')
+
+        names = {}
+        for _, amenities in hostels.iterator(chunk_size=batch_size):
+            for amenity in amenities or []:
+                names.setdefault(slugify(amenity), amenity)
+        names.pop('', None)
+        Amenity.objects.bulk_create(
+            [Amenity(slug=slug, name=name) for slug, name in names.items()],
+            ignore_conflicts=True
+        )
+        amenity_ids = dict(Amenity.objects.values_list('slug', 'id'))
+
+        linked = 0
+        batch = []
+        for row in hostels.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                linked += self.link_batch(batch, amenity_ids)
+                batch = []
+        if batch:
+            linked += self.link_batch(batch, amenity_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Synced {len(names)} amenities and {linked} hostel amenity links'
+        ))
+
+    def link_batch(self, batch, amenity_ids):
+        links = {
+            (pk, amenity_ids[slugify(amenity)])
+            for pk, amenities in batch
+            for amenity in amenities or []
+            if slugify(amenity) in amenity_ids
+        }
+        with transaction.atomic():
+            HostelAmenity.objects.filter(hostel_id__in=[pk for pk, _ in batch]).delete()
+            HostelAmenity.objects.bulk_create(
+                [HostelAmenity(hostel_id=pk, amenity_id=amenity_id) for pk, amenity_id in links]
+            )
+        return len(links)
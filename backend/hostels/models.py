@@ -1,8 +1,42 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast
+from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+class HostelQuerySet(models.QuerySet):
+    def for_listing(self, fields=None):
+        """
+        Load what HostelSerializer reads in a fixed number of queries.
+        fields limits loading to the serializer fields that will be rendered.
+        """
+        def wanted(name):
+            return fields is None or name in fields
+        
+        queryset = self.defer('search_document')
+        if not wanted('description'):
+            queryset = queryset.defer('description')
+        if wanted('landlord_name'):
+            queryset = queryset.select_related('landlord')
+        relations = [name for name in ('images', 'room_types') if wanted(name)]
+        if relations:
+            queryset = queryset.prefetch_related(*relations)
+        return queryset
+    
+    def for_card(self):
+        """Only the columns HostelCardSerializer renders, with the first image and cheapest room as subqueries"""
+        images = HostelImage.objects.filter(hostel=OuterRef('pk')).order_by('-is_primary', 'id')
+        room_types = RoomType.objects.filter(hostel=OuterRef('pk')).order_by('price')
+        return self.only(
+            'id', 'name', 'price', 'average_rating', 'review_count', 'created_at'
+        ).annotate(
+            primary_image=Subquery(images.values('image')[:1]),
+            primary_image_variants=Subquery(images.values('variants')[:1]),
+            min_room_price=Subquery(room_types.values('price')[:1])
+        )
+
 class Hostel(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField()
@@ -15,28 +49,100 @@ class Hostel(models.Model):
     available = models.BooleanField(default=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    # Rating aggregates maintained incrementally by the reviews app
+    rating_sum = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0, db_index=True)
+    # Denormalized text that full-text search runs against
+    search_document = models.TextField(blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = HostelQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Bounding-box prefilter for "near me" searches
+            models.Index(fields=['latitude', 'longitude']),
+            # Default listing order of the public hostel list, which only shows available hostels
+            models.Index(fields=['-created_at'], condition=Q(available=True), name='hostel_available_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'search_document'}
+        super().save(*args, **kwargs)
+    
+    def sync_amenities(self):
+        """Mirror the amenities JSON list into the indexed HostelAmenity join table"""
+        names = {slugify(amenity): amenity for amenity in self.amenities or []}
+        names.pop('', None)
+        Amenity.objects.bulk_create(
+            [Amenity(slug=slug, name=name) for slug, name in names.items()],
+            ignore_conflicts=True
+        )
+        amenity_ids = list(Amenity.objects.filter(slug__in=names).values_list('id', flat=True))
+        self.amenity_links.exclude(amenity_id__in=amenity_ids).delete()
+        HostelAmenity.objects.bulk_create(
+            [HostelAmenity(hostel=self, amenity_id=amenity_id) for amenity_id in amenity_ids],
+            ignore_conflicts=True
+        )
+    
+    def build_search_document(self):
+        parts = [self.name, self.location, self.university, self.description]
+        parts.extend(str(amenity) for amenity in self.amenities or [])
+        return ' '.join(part for part in parts if part)
+    
+    @classmethod
+    def adjust_rating(cls, hostel_id, rating_delta, count_delta):
+        """Apply a review change to the stored rating aggregates"""
+        with transaction.atomic():
+            cls.objects.filter(pk=hostel_id).update(
+                rating_sum=F('rating_sum') + rating_delta,
+                review_count=F('review_count') + count_delta
+            )
+            cls.objects.filter(pk=hostel_id).update(average_rating=cls.average_rating_expression())
+    
+    @staticmethod
+    def average_rating_expression():
+        return Case(
+            When(review_count=0, then=Value(0.0)),
+            default=Cast('rating_sum', models.FloatField()) / F('review_count'),
+            output_field=models.FloatField()
+        )
+
+class Amenity(models.Model):
+    slug = models.SlugField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+    
+    class Meta:
+        verbose_name_plural = 'amenities'
+    
     def __str__(self):
         return self.name
+
+class HostelAmenity(models.Model):
+    hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name='amenity_links')
+    amenity = models.ForeignKey(Amenity, on_delete=models.CASCADE, related_name='hostel_links')
     
-    @property
-    def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
-        return 0
+    class Meta:
+        unique_together = ['hostel', 'amenity']
+        indexes = [models.Index(fields=['amenity', 'hostel'])]
     
-    @property
-    def review_count(self):
-        return self.reviews.count()
+    def __str__(self):
+        return f"{self.hostel.name} - {self.amenity.name}"
 
 class HostelImage(models.Model):
     hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='hostel_images/')
     caption = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
+    # Resized WebP/JPEG copies, filled in by hostels.tasks.process_hostel_image
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -63,4 +169,14 @@ class Wishlist(models.Model):
         unique_together = ['user', 'hostel']
     
     def __str__(self):
-        return f"{self.user.username} - {self.hostel.name}"
\ No newline at end of file
+        return f"{self.user.username} - {self.hostel.name}"
+
+class SimilarHostels(models.Model):
+    """Most similar hostels by feature vector, best first; rebuilt by hostels.similarity"""
+    hostel = models.OneToOneField(Hostel, on_delete=models.CASCADE, primary_key=True, related_name='similar_hostels')
+    hostel_ids = models.JSONField(default=list)
+    scores = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Similar to {self.hostel.name}"
\ No newline at end of file
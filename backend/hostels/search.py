@@ -0,0 +1,160 @@
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from .models import Hostel
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+# The in-process fallback ranks in Python and hands the top matches back to
+# the database as an id list, so cap it to keep the query size bounded.
+FALLBACK_RESULT_LIMIT = 500
+
+SEARCH_INDEX_NAME = 'hostels_hostel_search_gin'
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def search_index_sql():
+    """GIN index matching the expression SearchVector('search_document', config='simple') compiles to"""
+    return (
+        f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} ON {Hostel._meta.db_table} "
+        "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_document, '')))"
+    )
+
+
+def ensure_search_index(using='default', **kwargs):
+    from django.db import connections
+    conn = connections[using]
+    if conn.vendor != 'postgresql':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(search_index_sql())
+
+
+class InvertedIndex:
+    """
+    In-process term -> {hostel_id: term_frequency} index used when Postgres
+    full-text search is unavailable. It is for development only: each process
+    keeps its own copy, and hostel saves only update the copy in the process
+    that made them, so run a single process (runserver) against SQLite.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = None
+        self._documents = {}
+        self._sorted_terms = None
+
+    def reset(self):
+        with self._lock:
+            self._postings = None
+            self._documents = {}
+            self._sorted_terms = None
+
+    def _ensure_built(self):
+        if self._postings is not None:
+            return
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        for pk, document in Hostel.objects.values_list('pk', 'search_document').iterator(chunk_size=2000):
+            self._add(pk, document)
+
+    def _add(self, pk, document):
+        counts = defaultdict(int)
+        for term in tokenize(document or ''):
+            counts[term] += 1
+        for term, frequency in counts.items():
+            if term not in self._postings:
+                self._sorted_terms = None
+            self._postings[term][pk] = frequency
+        self._documents[pk] = set(counts)
+
+    def _remove(self, pk):
+        for term in self._documents.pop(pk, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+
+    def update(self, pk, document):
+        with self._lock:
+            if self._postings is None:
+                return
+            self._remove(pk)
+            self._add(pk, document)
+
+    def remove(self, pk):
+        with self._lock:
+            if self._postings is None:
+                return
+            self._remove(pk)
+
+    def _expand(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        index = bisect_left(terms, prefix)
+        while index < len(terms) and terms[index].startswith(prefix):
+            yield terms[index]
+            index += 1
+
+    def search(self, terms):
+        """Return {hostel_id: score} for documents matching every term as a prefix"""
+        with self._lock:
+            self._ensure_built()
+            total = len(self._documents) or 1
+            scores = None
+            for term in terms:
+                matches = defaultdict(int)
+                for expansion in self._expand(term):
+                    for pk, frequency in self._postings[expansion].items():
+                        matches[pk] = max(matches[pk], frequency)
+                if not matches:
+                    return {}
+                idf = math.log(1 + total / len(matches))
+                term_scores = {pk: idf * frequency / (frequency + 1.2) for pk, frequency in matches.items()}
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {pk: score + term_scores[pk] for pk, score in scores.items() if pk in term_scores}
+            return scores or {}
+
+
+search_index = InvertedIndex()
+
+
+def search_hostels(queryset, text):
+    """Filter queryset to hostels matching text and annotate a search_rank for ordering"""
+    terms = tokenize(text)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector('search_document', config='simple')
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config='simple', search_type='raw')
+        return queryset.annotate(search=vector).filter(search=query).annotate(
+            search_rank=SearchRank(vector, query)
+        )
+
+    scores = search_index.search(terms)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:FALLBACK_RESULT_LIMIT]
+    if not ranked:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    return queryset.filter(pk__in=ranked).annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(scores[pk])) for pk in ranked],
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+    )
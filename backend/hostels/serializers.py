@@ -1,30 +1,48 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from core.images import srcset, variant_urls
+from core.serializers import DynamicFieldsMixin
+from .cache import get_wishlist_ids
 from .models import Hostel, HostelImage, RoomType, Wishlist
 
 class HostelImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
     
     class Meta:
         model = HostelImage
-        fields = ['id', 'image', 'image_url', 'caption', 'is_primary']
+        fields = ['id', 'image', 'image_url', 'srcset', 'variants', 'caption', 'is_primary']
     
     def get_image_url(self, obj):
         if obj.image:
             return self.context['request'].build_absolute_uri(obj.image.url)
         return None
+    
+    def get_srcset(self, obj):
+        # WebP candidates; empty until the background resize has run
+        return srcset(self.context['request'], obj.image.storage, obj.variants)
+    
+    def get_variants(self, obj):
+        request = self.context['request']
+        return {
+            'webp': variant_urls(request, obj.image.storage, obj.variants, 'webp'),
+            'jpeg': variant_urls(request, obj.image.storage, obj.variants, 'jpeg'),
+        }
 
 class RoomTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = RoomType
         fields = ['id', 'type', 'price', 'available', 'total', 'features', 'description']
 
-class HostelSerializer(serializers.ModelSerializer):
+class HostelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = HostelImageSerializer(many=True, read_only=True)
     room_types = RoomTypeSerializer(many=True, read_only=True)
     landlord_name = serializers.CharField(source='landlord.get_full_name', read_only=True)
     average_rating = serializers.ReadOnlyField()
     review_count = serializers.ReadOnlyField()
     is_wishlisted = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = Hostel
@@ -32,15 +50,43 @@ class HostelSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'price', 'location', 'university',
             'landlord', 'landlord_name', 'amenities', 'verified', 'available',
             'latitude', 'longitude', 'created_at', 'updated_at', 'images',
-            'room_types', 'average_rating', 'review_count', 'is_wishlisted'
+            'room_types', 'average_rating', 'review_count', 'is_wishlisted',
+            'distance_km'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'verified']
     
     def get_is_wishlisted(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Wishlist.objects.filter(user=request.user, hostel=obj).exists()
-        return False
+        # Loaded once per response and shared through the context by every row and nesting level
+        if 'wishlist_ids' not in self.context:
+            request = self.context.get('request')
+            self.context['wishlist_ids'] = get_wishlist_ids(request.user) if request else frozenset()
+        return obj.pk in self.context['wishlist_ids']
+
+    def get_distance_km(self, obj):
+        # Only present when the list was filtered with ?near=
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+class HostelCardSerializer(serializers.ModelSerializer):
+    """Compact representation for search result cards (?view=card)"""
+    primary_image = serializers.SerializerMethodField()
+    primary_image_srcset = serializers.SerializerMethodField()
+    min_room_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = Hostel
+        fields = [
+            'id', 'name', 'price', 'primary_image', 'primary_image_srcset',
+            'average_rating', 'review_count', 'min_room_price'
+        ]
+    
+    def get_primary_image(self, obj):
+        if obj.primary_image:
+            return self.context['request'].build_absolute_uri(default_storage.url(obj.primary_image))
+        return None
+    
+    def get_primary_image_srcset(self, obj):
+        return srcset(self.context['request'], default_storage, obj.primary_image_variants)
 
 class HostelCreateSerializer(serializers.ModelSerializer):
     images = serializers.ListField(
@@ -84,7 +130,7 @@ class HostelCreateSerializer(serializers.ModelSerializer):
         
         return hostel
 
-class WishlistSerializer(serializers.ModelSerializer):
+class WishlistSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     hostel = HostelSerializer(read_only=True)
     
     class Meta:
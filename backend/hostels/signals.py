@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .cache import invalidate_hostel
+from .models import Hostel, HostelImage, RoomType
+from .search import search_index
+from .tasks import process_hostel_image
+
+
+@receiver(post_save, sender=Hostel)
+def index_hostel(sender, instance, **kwargs):
+    search_index.update(instance.pk, instance.search_document)
+
+
+@receiver(post_save, sender=Hostel)
+def sync_hostel_amenities(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'amenities' in update_fields:
+        instance.sync_amenities()
+
+
+@receiver(post_delete, sender=Hostel)
+def unindex_hostel(sender, instance, **kwargs):
+    search_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=Hostel)
+@receiver(post_delete, sender=Hostel)
+def invalidate_hostel_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_hostel(instance.pk))
+
+
+@receiver(post_save, sender=HostelImage)
+@receiver(post_delete, sender=HostelImage)
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+@receiver(post_save, sender='reviews.Review')
+@receiver(post_delete, sender='reviews.Review')
+def invalidate_related_hostel_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_hostel(instance.hostel_id))
+
+
+@receiver(post_save, sender=HostelImage)
+@receiver(post_delete, sender=HostelImage)
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+@receiver(post_save, sender='reviews.Review')
+@receiver(post_delete, sender='reviews.Review')
+def touch_hostel(sender, instance, **kwargs):
+    # Keeps Hostel.updated_at a valid Last-Modified for the nested detail payload
+    Hostel.objects.filter(pk=instance.hostel_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=HostelImage)
+def schedule_image_processing(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: process_hostel_image.delay(instance.pk))
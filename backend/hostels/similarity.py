@@ -0,0 +1,216 @@
+import numpy as np
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Hostel, HostelAmenity, SimilarHostels
+
+# Neighbours kept per hostel; more than the API serves so unavailable ones can be skipped
+NEIGHBOURS_STORED = 20
+# Rows scored per matrix product; bounds memory at BATCH_SIZE x hostel count floats
+BATCH_SIZE = 512
+# Above this share of changed hostels an incremental run costs as much as a full one
+FULL_REBUILD_RATIO = 0.25
+# Hostels outside their university that members of too-small groups are compared against
+FALLBACK_POOL_SIZE = 2000
+
+# Relative weight of each feature block in the cosine similarity
+WEIGHTS = {
+    'price': 2.0,
+    'location': 1.5,
+    'university': 1.5,
+    'amenities': 1.0,
+    'rating': 0.5,
+}
+
+
+def _standardize(values):
+    # Missing values land on the mean (0) so they neither attract nor repel
+    values = np.asarray(values, dtype=np.float64)
+    known = ~np.isnan(values)
+    if not known.any():
+        return np.zeros(len(values), dtype=np.float32)
+    std = values[known].std() or 1.0
+    return np.where(known, (values - values[known].mean()) / std, 0.0).astype(np.float32)
+
+
+def feature_matrix():
+    """
+    Hostel ids in id order, one feature row per hostel, each hostel's
+    university group and its university weight. University is a one-hot
+    block of the vector in principle, but storing it densely costs a column
+    per distinct free-text university. Its only contribution to a dot
+    product is weight**2 for hostels sharing a university, so rows are
+    normalised as if the block were there and similarity() adds it back.
+    """
+    rows = list(Hostel.objects.order_by('pk').values_list(
+        'pk', 'price', 'university', 'latitude', 'longitude', 'average_rating'
+    ))
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    position = {pk: index for index, pk in enumerate(ids.tolist())}
+
+    universities = {}
+    university_index = np.array(
+        [universities.setdefault(row[2].strip().lower(), len(universities)) for row in rows], dtype=np.int64
+    )
+    links = [(position[hostel_id], amenity_id) for hostel_id, amenity_id in HostelAmenity.objects.values_list(
+        'hostel_id', 'amenity_id'
+    ) if hostel_id in position]
+    amenities = {}
+    amenity_index = np.array([amenities.setdefault(amenity_id, len(amenities)) for _, amenity_id in links], dtype=np.int64)
+
+    count = len(rows)
+    offset = 5
+    matrix = np.zeros((count, offset + len(amenities)), dtype=np.float32)
+    matrix[:, 0] = WEIGHTS['price'] * _standardize(np.log1p([float(row[1]) for row in rows]))
+    matrix[:, 1] = WEIGHTS['location'] * _standardize([np.nan if row[3] is None else float(row[3]) for row in rows])
+    matrix[:, 2] = WEIGHTS['location'] * _standardize([np.nan if row[4] is None else float(row[4]) for row in rows])
+    matrix[:, 3] = WEIGHTS['rating'] * np.array([row[5] for row in rows], dtype=np.float32) / 5
+    # Constant column keeps hostels with otherwise empty vectors comparable
+    matrix[:, 4] = 0.1
+    if links:
+        link_rows = np.array([row for row, _ in links], dtype=np.int64)
+        per_hostel = np.bincount(link_rows, minlength=count).astype(np.float32)
+        # Scale each hostel's amenity block to the same length however many it lists
+        matrix[link_rows, offset + amenity_index] = WEIGHTS['amenities'] / np.sqrt(per_hostel[link_rows])
+
+    norms = np.sqrt(np.square(matrix).sum(axis=1) + WEIGHTS['university'] ** 2)
+    matrix /= norms[:, None]
+    return ids, matrix, university_index, (WEIGHTS['university'] / norms).astype(np.float32)
+
+
+def similarity(matrix, groups, university_weight, rows, columns):
+    """Cosine similarity of rows against columns (position arrays), including the shared-university term"""
+    scores = matrix[rows] @ matrix[columns].T
+    same = groups[rows][:, None] == groups[columns][None, :]
+    scores += np.outer(university_weight[rows], university_weight[columns]) * same
+    return scores
+
+
+def candidate_pool(ids, groups, k):
+    """
+    Hostels are compared within their university, which keeps the work at the
+    sum of squared group sizes instead of the square of the catalogue. Groups
+    too small to fill k neighbours also get a fixed pool of at most
+    FALLBACK_POOL_SIZE hostels, so many small groups stay linear in their
+    size. The pool is the hostels with the smallest id hashes, which keeps
+    it stable from run to run. Returns a per-position flag for members of
+    small groups and a per-position flag for pool members.
+    """
+    sizes = np.bincount(groups)
+    in_pool = np.ones(len(ids), dtype=bool)
+    if len(ids) > FALLBACK_POOL_SIZE:
+        hashes = (ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+        in_pool[:] = False
+        in_pool[np.argpartition(hashes, FALLBACK_POOL_SIZE - 1)[:FALLBACK_POOL_SIZE]] = True
+    return sizes[groups] <= k, in_pool
+
+
+def top_neighbours(matrix, groups, university_weight, ids, subjects, k):
+    """{subject position: (neighbour positions, cosine scores)} for the k most similar candidates, best first"""
+    small, in_pool = candidate_pool(ids, groups, k)
+    pool = np.flatnonzero(in_pool)
+    result = {}
+    for group in np.unique(groups[subjects]):
+        members = subjects[groups[subjects] == group]
+        candidates = np.flatnonzero(groups == group)
+        if small[members[0]]:
+            candidates = np.union1d(candidates, pool)
+        group_k = min(k, len(candidates) - 1)
+        for start in range(0, len(members), BATCH_SIZE):
+            batch = members[start:start + BATCH_SIZE]
+            if group_k <= 0:
+                result.update((subject, (pool[:0], np.zeros(0, dtype=np.float32))) for subject in batch.tolist())
+                continue
+            scores = similarity(matrix, groups, university_weight, batch, candidates)
+            scores[np.arange(len(batch)), np.searchsorted(candidates, batch)] = -np.inf
+            best = np.argpartition(-scores, group_k - 1, axis=1)[:, :group_k]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-best_scores, axis=1)
+            best = candidates[np.take_along_axis(best, order, axis=1)]
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            for row, subject in enumerate(batch.tolist()):
+                result[subject] = (best[row], best_scores[row])
+    return result
+
+
+def _affected(matrix, groups, university_weight, ids, changed, stored):
+    """Positions of unchanged hostels whose stored neighbours a change may have altered"""
+    changed_ids = set(ids[changed].tolist())
+    position = {pk: index for index, pk in enumerate(ids.tolist())}
+    small, in_pool = candidate_pool(ids, groups, NEIGHBOURS_STORED)
+    thresholds = np.full(len(ids), -np.inf, dtype=np.float32)
+    affected = set()
+    for index, pk in enumerate(ids.tolist()):
+        neighbours = stored.get(pk)
+        if neighbours is None:
+            continue
+        hostel_ids, scores = neighbours
+        # A changed or deleted hostel in the list invalidates its score and may open a slot, and one
+        # this hostel no longer compares against (its group grew, or the pool moved on) must go
+        if any(
+            neighbour in changed_ids or neighbour not in position
+            or (groups[position[neighbour]] != groups[index] and not (small[index] and in_pool[position[neighbour]]))
+            for neighbour in hostel_ids
+        ):
+            affected.add(index)
+        elif len(hostel_ids) >= NEIGHBOURS_STORED:
+            thresholds[index] = scores[-1]
+
+    # A changed hostel now scoring above an unchanged hostel's weakest
+    # neighbour displaces it, if that hostel would consider it at all
+    everyone = np.arange(len(ids))
+    for start in range(0, len(changed), BATCH_SIZE):
+        batch = changed[start:start + BATCH_SIZE]
+        scores = similarity(matrix, groups, university_weight, batch, everyone)
+        scores[np.arange(len(batch)), batch] = -np.inf
+        considered = (groups[batch][:, None] == groups[None, :]) | (in_pool[batch][:, None] & small[None, :])
+        affected.update(np.flatnonzero(((scores > thresholds) & considered).any(axis=0)).tolist())
+    return affected - set(changed.tolist())
+
+
+def rebuild_similar_hostels(full=False):
+    """
+    Recompute stored neighbour lists. Incremental runs cover hostels changed
+    since their list was computed plus the hostels whose lists those changes
+    can affect. Returns the number of lists written.
+    """
+    started = timezone.now()
+    ids, matrix, groups, university_weight = feature_matrix()
+    if not len(ids):
+        return 0
+    position = {pk: index for index, pk in enumerate(ids.tolist())}
+
+    if full:
+        subjects = np.arange(len(ids))
+    else:
+        changed_ids = Hostel.objects.filter(
+            Q(similar_hostels__isnull=True) | Q(updated_at__gt=F('similar_hostels__computed_at'))
+        ).values_list('pk', flat=True)
+        changed = np.array(sorted(position[pk] for pk in changed_ids if pk in position), dtype=np.int64)
+        if not len(changed):
+            return 0
+        if len(changed) > FULL_REBUILD_RATIO * len(ids):
+            subjects = np.arange(len(ids))
+        else:
+            stored = {
+                pk: (hostel_ids, scores)
+                for pk, hostel_ids, scores in SimilarHostels.objects.values_list('hostel_id', 'hostel_ids', 'scores')
+            }
+            subjects = np.array(sorted(set(changed.tolist()) | _affected(matrix, groups, university_weight, ids, changed, stored)), dtype=np.int64)
+
+    neighbours = top_neighbours(matrix, groups, university_weight, ids, subjects, NEIGHBOURS_STORED)
+    SimilarHostels.objects.bulk_create(
+        [
+            SimilarHostels(
+                hostel_id=int(ids[subject]),
+                hostel_ids=ids[positions].tolist(),
+                scores=[round(float(score), 4) for score in scores],
+                computed_at=started
+            )
+            for subject, (positions, scores) in neighbours.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['hostel'],
+        update_fields=['hostel_ids', 'scores', 'computed_at']
+    )
+    return len(subjects)
@@ -0,0 +1,25 @@
+from celery import shared_task
+from core.images import build_variants, delete_files, variant_names
+from .models import HostelImage
+from .similarity import rebuild_similar_hostels
+
+
+@shared_task
+def process_hostel_image(image_id):
+    """Generate thumbnail and WebP variants for an uploaded hostel image"""
+    try:
+        hostel_image = HostelImage.objects.get(pk=image_id)
+    except HostelImage.DoesNotExist:
+        return
+    if not hostel_image.image:
+        return
+    stale = variant_names(hostel_image.variants)
+    hostel_image.variants = build_variants(hostel_image.image)
+    hostel_image.save(update_fields=['variants'])
+    delete_files(hostel_image.image.storage, stale - variant_names(hostel_image.variants))
+
+
+@shared_task
+def refresh_similar_hostels(full=False):
+    """Rebuild similar-hostel lists for hostels changed since the last run, or all of them"""
+    return rebuild_similar_hostels(full=full)
\ No newline at end of file
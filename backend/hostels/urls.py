@@ -3,9 +3,14 @@ from . import views
 
 urlpatterns = [
     path('', views.HostelListCreateView.as_view(), name='hostel-list-create'),
+    path('import/', views.import_hostels, name='import-hostels'),
+    path('facets/', views.HostelFacetsView.as_view(), name='hostel-facets'),
     path('<int:pk>/', views.HostelDetailView.as_view(), name='hostel-detail'),
+    path('<int:hostel_id>/similar/', views.similar_hostels, name='similar-hostels'),
+    path('<int:hostel_id>/availability/', views.hostel_availability, name='hostel-availability'),
     path('<int:hostel_id>/wishlist/add/', views.add_to_wishlist, name='add-to-wishlist'),
     path('<int:hostel_id>/wishlist/remove/', views.remove_from_wishlist, name='remove-from-wishlist'),
     path('wishlist/', views.WishlistView.as_view(), name='wishlist'),
+    path('wishlist/ids/', views.wishlist_ids, name='wishlist-ids'),
     path('my-hostels/', views.LandlordHostelsView.as_view(), name='landlord-hostels'),
 ]
\ No newline at end of file
@@ -1,34 +1,101 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Hostel, Wishlist
-from .serializers import HostelSerializer, HostelCreateSerializer, WishlistSerializer
-from .filters import HostelFilter
+from rest_framework.filters import OrderingFilter
+from .models import Hostel, SimilarHostels, Wishlist
+from .serializers import HostelSerializer, HostelCardSerializer, HostelCreateSerializer, WishlistSerializer
+from core.mixins import ConditionalRequestMixin
+from core.pagination import FeedPagination
+from core.serializers import requested_fields
+from bookings.availability import calendar, parse_window
+from .cache import (
+    AnonymousResponseCacheMixin, LIST_VERSION_KEY, detail_version_key, get_wishlist_ids, invalidate_wishlist,
+    response_cache_key
+)
+from .facets import compute_facets
+from .importers import IMPORT_FORMATS, HostelImporter, detect_format, iter_rows
+from .filters import HostelFilter, HostelNearbyFilter, HostelSearchFilter
 
-class HostelListCreateView(generics.ListCreateAPIView):
-    queryset = Hostel.objects.filter(available=True)
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+class HostelListCreateView(AnonymousResponseCacheMixin, generics.ListCreateAPIView):
+    # Nearby and search run after ordering so they can order by distance/relevance when no ?ordering= is given
+    filter_backends = [DjangoFilterBackend, OrderingFilter, HostelNearbyFilter, HostelSearchFilter]
     filterset_class = HostelFilter
-    search_fields = ['name', 'location', 'university', 'description']
+    pagination_class = FeedPagination
     ordering_fields = ['price', 'created_at', 'average_rating']
     ordering = ['-created_at']
     
+    def is_card_view(self):
+        return self.request.query_params.get('view') == 'card'
+    
+    def get_queryset(self):
+        queryset = Hostel.objects.filter(available=True)
+        if self.is_card_view():
+            return queryset.for_card()
+        return queryset.for_listing(requested_fields(self.request))
+    
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return HostelCreateSerializer
+        if self.is_card_view():
+            return HostelCardSerializer
         return HostelSerializer
     
+    def get_cache_version_key(self):
+        return LIST_VERSION_KEY
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+    
     def get_permissions(self):
         if self.request.method == 'POST':
             return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
 
-class HostelDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Hostel.objects.all()
+class HostelFacetsView(generics.GenericAPIView):
+    """Facet counts for the sidebar, filtered by the same parameters as the hostel list"""
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend, HostelNearbyFilter, HostelSearchFilter]
+    filterset_class = HostelFilter
+    
+    def get_queryset(self):
+        return Hostel.objects.filter(available=True)
+    
+    def get(self, request, *args, **kwargs):
+        # Not per-user, so cache for everyone; the key's list version is bumped on hostel changes
+        key = response_cache_key(request, LIST_VERSION_KEY)
+        facets = cache.get(key)
+        if facets is None:
+            facets = compute_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(key, facets, settings.HOSTEL_CACHE_TIMEOUT)
+        return Response(facets)
+
+class HostelDetailView(ConditionalRequestMixin, AnonymousResponseCacheMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = HostelSerializer
     
+    def get_queryset(self):
+        return Hostel.objects.for_listing(requested_fields(self.request))
+    
+    def get_cache_version_key(self):
+        return detail_version_key(self.kwargs['pk'])
+    
+    def get_validators(self):
+        # Image, room type and review changes touch updated_at (see signals)
+        user = self.request.user
+        queryset = Hostel.objects.filter(pk=self.kwargs['pk'])
+        if not user.is_authenticated:
+            row = queryset.values('updated_at').first()
+            return row and ([row['updated_at']], row['updated_at'])
+        # is_wishlisted makes the representation per-user, so only the ETag is meaningful
+        row = queryset.values('updated_at').first()
+        return row and ([row['updated_at'], user.pk, int(self.kwargs['pk']) in get_wishlist_ids(user)], None)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+    
     def get_permissions(self):
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
             return [permissions.IsAuthenticated()]
@@ -51,6 +118,7 @@ def add_to_wishlist(request, hostel_id):
             hostel=hostel
         )
         if created:
+            invalidate_wishlist(request.user.pk)
             return Response({'message': 'Added to wishlist'}, status=status.HTTP_201_CREATED)
         else:
             return Response({'message': 'Already in wishlist'}, status=status.HTTP_200_OK)
@@ -63,20 +131,89 @@ def remove_from_wishlist(request, hostel_id):
     try:
         wishlist_item = Wishlist.objects.get(user=request.user, hostel_id=hostel_id)
         wishlist_item.delete()
+        invalidate_wishlist(request.user.pk)
         return Response({'message': 'Removed from wishlist'}, status=status.HTTP_200_OK)
     except Wishlist.DoesNotExist:
         return Response({'error': 'Not in wishlist'}, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def hostel_availability(request, hostel_id):
+    """Per-night free beds for each room type between ?start= and ?end= (end exclusive)"""
+    try:
+        hostel = Hostel.objects.only('id').get(id=hostel_id)
+    except Hostel.DoesNotExist:
+        return Response({'error': 'Hostel not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        start, end = parse_window(request.query_params.get('start'), request.query_params.get('end'))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'hostel': hostel.id,
+        'start': start,
+        'end': end,
+        'room_types': calendar(hostel.room_types.order_by('id'), start, end),
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def similar_hostels(request, hostel_id):
+    """Available hostels most like hostel_id, best match first, as cards"""
+    neighbour_ids = SimilarHostels.objects.filter(hostel_id=hostel_id).values_list('hostel_ids', flat=True).first()
+    if neighbour_ids is None:
+        if not Hostel.objects.filter(id=hostel_id).exists():
+            return Response({'error': 'Hostel not found'}, status=status.HTTP_404_NOT_FOUND)
+        neighbour_ids = []
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 20))
+    except ValueError:
+        return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    hostels = {hostel.pk: hostel for hostel in Hostel.objects.filter(pk__in=neighbour_ids, available=True).for_card()}
+    ordered = [hostels[pk] for pk in neighbour_ids if pk in hostels][:limit]
+    return Response(HostelCardSerializer(ordered, many=True, context={'request': request}).data)
+
 class WishlistView(generics.ListAPIView):
     serializer_class = WishlistSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user)
+        user = self.request.user
+        hostels = Hostel.objects.for_listing(requested_fields(self.request, 'hostel'))
+        return Wishlist.objects.filter(user=user).prefetch_related(
+            Prefetch('hostel', queryset=hostels)
+        ).order_by('-created_at')
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def wishlist_ids(request):
+    """Ids of the caller's wishlisted hostels, for marking hearts without loading the wishlist"""
+    return Response({'ids': sorted(get_wishlist_ids(request.user))})
 
 class LandlordHostelsView(generics.ListAPIView):
     serializer_class = HostelSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Hostel.objects.filter(landlord=self.request.user)
\ No newline at end of file
+        return Hostel.objects.filter(landlord=self.request.user).for_listing(
+            requested_fields(self.request)
+        ).order_by('-created_at')
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_hostels(request):
+    """Bulk-create hostels with room types from an uploaded CSV or JSONL file"""
+    if request.user.role not in ['landlord', 'agent', 'admin'] and not request.user.is_staff:
+        return Response({'error': 'Only landlords, agents and admins can import hostels'}, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = request.data.get('file_format') or detect_format(upload.name)
+    if file_format not in IMPORT_FORMATS:
+        return Response({'error': f'file_format must be one of {", ".join(IMPORT_FORMATS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    summary = HostelImporter(request.user).run(iter_rows(upload, file_format))
+    response_status = status.HTTP_201_CREATED if summary['created'] else status.HTTP_400_BAD_REQUEST
+    return Response(summary, status=response_status)
\ No newline at end of file
@@ -21,6 +21,11 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # The notification feed, and the unread badge count
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', 'read', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
\ No newline at end of file
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class PaymentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'payments'
\ No newline at end of file
+    name = 'payments'
+
+    def ready(self):
+        from .mpesa import check_mpesa_settings
+        checks.register(check_mpesa_settings)
\ No newline at end of file
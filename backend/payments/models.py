@@ -33,13 +33,22 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # A user's payment history, newest first
+            models.Index(fields=['user', '-created_at']),
+            # Keyset scan for the abandoned payment sweep
+            models.Index(fields=['status', 'id']),
+        ]
+    
     def __str__(self):
         return f"{self.user.username} - {self.amount} ({self.status})"
 
 class MPesaTransaction(models.Model):
     payment = models.OneToOneField(Payment, on_delete=models.CASCADE, related_name='mpesa_transaction')
     merchant_request_id = models.CharField(max_length=100)
-    checkout_request_id = models.CharField(max_length=100)
+    # The M-Pesa callback looks transactions up by this
+    checkout_request_id = models.CharField(max_length=100, db_index=True)
     phone_number = models.CharField(max_length=15)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     account_reference = models.CharField(max_length=100)
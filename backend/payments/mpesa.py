@@ -0,0 +1,223 @@
+import base64
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+import requests
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_KEY = 'mpesa:access_token'
+TOKEN_LOCK_KEY = 'mpesa:access_token:lock'
+TOKEN_ERROR_KEY = 'mpesa:access_token:error'
+# Tokens are dropped this long before Daraja expires them, so none is used as it lapses
+TOKEN_EXPIRY_MARGIN = 60
+# Seconds between checks for a token another worker is fetching
+TOKEN_WAIT_INTERVAL = 0.1
+# Seconds a failed refresh is remembered, so waiters give up instead of each retrying Daraja in turn
+TOKEN_ERROR_SECONDS = 5
+# Daraja's errorCode for an expired or revoked access token
+INVALID_TOKEN_ERROR = '404.001.03'
+
+# Seconds one Password/Timestamp pair is reused across STK pushes
+PASSWORD_REUSE_SECONDS = 60
+
+
+class MPesaError(Exception):
+    """Daraja could not be reached or did not answer in time"""
+
+
+_password = None
+_password_lock = threading.Lock()
+
+
+def generate_password():
+    """Base64 STK push password and the timestamp it was built from, reused for PASSWORD_REUSE_SECONDS"""
+    global _password
+    with _password_lock:
+        if _password is None or time.monotonic() - _password[0] >= PASSWORD_REUSE_SECONDS:
+            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+            data_to_encode = settings.MPESA_SHORTCODE + settings.MPESA_PASSKEY + timestamp
+            _password = (time.monotonic(), base64.b64encode(data_to_encode.encode()).decode('utf-8'), timestamp)
+        return _password[1], _password[2]
+
+
+def stk_push_payload(payment, description):
+    password, timestamp = generate_password()
+    return {
+        'BusinessShortCode': settings.MPESA_SHORTCODE,
+        'Password': password,
+        'Timestamp': timestamp,
+        'TransactionType': 'CustomerPayBillOnline',
+        'Amount': int(payment.amount),
+        'PartyA': payment.phone_number,
+        'PartyB': settings.MPESA_SHORTCODE,
+        'PhoneNumber': payment.phone_number,
+        'CallBackURL': settings.MPESA_CALLBACK_URL,
+        'AccountReference': payment.transaction_id,
+        'TransactionDesc': description,
+    }
+
+
+class DarajaClient:
+    """Safaricom Daraja API over one keep-alive session per worker process"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (settings.MPESA_CONNECT_TIMEOUT, settings.MPESA_READ_TIMEOUT)
+        self.session = requests.Session()
+        retries = settings.MPESA_MAX_RETRIES
+        # The OAuth GET is idempotent, so gateway errors are retried as well as connection failures
+        token_retry = Retry(
+            total=retries, connect=retries, read=0, status_forcelist=[502, 503, 504],
+            allowed_methods=['GET'], backoff_factor=0.5, raise_on_status=False,
+        )
+        # The STK push is retried only when it never reached Daraja. A gateway
+        # timeout or read timeout may mean the customer was already prompted.
+        push_retry = Retry(
+            total=retries, connect=retries, read=0, status=0, other=0,
+            allowed_methods=['POST'], backoff_factor=0.5,
+        )
+        # requests picks the adapter with the longest matching prefix
+        self.session.mount(self.base_url + '/', HTTPAdapter(max_retries=token_retry, pool_maxsize=10))
+        self.session.mount(self.base_url + '/mpesa/', HTTPAdapter(max_retries=push_retry, pool_maxsize=10))
+        # A token refresh can take every attempt at full timeout plus the backoff between them;
+        # the refresh lock must outlive that or waiters would give up on a holder still working
+        backoff = sum(0.5 * 2 ** attempt for attempt in range(retries))
+        self.token_lock_timeout = int((retries + 1) * sum(self.timeout) + backoff) + 5
+
+    def _request(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise MPesaError(str(e)) from e
+
+    def _fetch_token(self):
+        data = self._request(
+            'GET', '/oauth/v1/generate', params={'grant_type': 'client_credentials'},
+            auth=(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET)
+        )
+        if not data.get('access_token'):
+            raise MPesaError(data.get('errorMessage', 'No access token in the OAuth response'))
+        try:
+            expires_in = int(data.get('expires_in', 3599))
+        except (TypeError, ValueError):
+            expires_in = 3599
+        cache.set(TOKEN_CACHE_KEY, data['access_token'], max(expires_in - TOKEN_EXPIRY_MARGIN, 1))
+        return data['access_token']
+
+    def access_token(self):
+        """
+        OAuth token shared by every worker through the cache until shortly
+        before it expires. Only the worker that takes the lock refreshes it;
+        the rest wait for its token rather than calling Daraja themselves,
+        and fail with it for TOKEN_ERROR_SECONDS if the refresh fails.
+        """
+        token = cache.get(TOKEN_CACHE_KEY)
+        if token:
+            return token
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.token_lock_timeout
+        while time.monotonic() < deadline:
+            error = cache.get(TOKEN_ERROR_KEY)
+            if error:
+                raise MPesaError(error)
+            if cache.add(TOKEN_LOCK_KEY, owner, self.token_lock_timeout):
+                try:
+                    # The previous holder may have stored a token since the first look
+                    return cache.get(TOKEN_CACHE_KEY) or self._fetch_token()
+                except MPesaError as e:
+                    cache.set(TOKEN_ERROR_KEY, str(e) or 'M-Pesa token refresh failed', TOKEN_ERROR_SECONDS)
+                    raise
+                finally:
+                    # Only release our own lock; get-then-delete leaves a tiny window,
+                    # but the lock outlives the slowest fetch so it has not expired here
+                    if cache.get(TOKEN_LOCK_KEY) == owner:
+                        cache.delete(TOKEN_LOCK_KEY)
+            time.sleep(TOKEN_WAIT_INTERVAL)
+            token = cache.get(TOKEN_CACHE_KEY)
+            if token:
+                return token
+        # Daraja is not handing out tokens; fail this push rather than join a stampede
+        raise MPesaError('Timed out waiting for an M-Pesa access token')
+
+    def stk_push(self, payload):
+        """Send the STK push and return Daraja's response body"""
+        data = self._post_stk_push(payload)
+        if data.get('errorCode') == INVALID_TOKEN_ERROR:
+            # Revoked before its expiry; refresh once and resend
+            cache.delete(TOKEN_CACHE_KEY)
+            data = self._post_stk_push(payload)
+        return data
+
+    def _post_stk_push(self, payload):
+        return self._request(
+            'POST', '/mpesa/stkpush/v1/processrequest', json=payload,
+            headers={'Authorization': f'Bearer {self.access_token()}'}
+        )
+
+
+class LocalDarajaClient:
+    """Stand-in that accepts every STK push without the network, for development and tests"""
+
+    def access_token(self):
+        return 'local-access-token'
+
+    def stk_push(self, payload):
+        request_id = uuid.uuid4().hex[:12]
+        return {
+            'MerchantRequestID': f'local-{request_id}',
+            'CheckoutRequestID': f'ws_CO_local_{request_id}',
+            'ResponseCode': '0',
+            'ResponseDescription': 'Success. Request accepted for processing',
+            'CustomerMessage': 'Success. Request accepted for processing',
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client_config_error():
+    """Why the MPESA_* settings cannot build a client, or None when they can"""
+    if settings.MPESA_CLIENT not in ('daraja', 'local'):
+        return f'MPESA_CLIENT must be daraja or local, not {settings.MPESA_CLIENT!r}'
+    if settings.MPESA_CLIENT == 'daraja' and not (settings.MPESA_CONSUMER_KEY and settings.MPESA_CONSUMER_SECRET):
+        return 'MPESA_CONSUMER_KEY and MPESA_CONSUMER_SECRET are required when MPESA_CLIENT is daraja'
+    return None
+
+
+def check_mpesa_settings(app_configs, **kwargs):
+    """System check run at startup, so a misconfigured client is reported before the first payment"""
+    error = client_config_error()
+    if error is None:
+        return []
+    if settings.MPESA_CLIENT not in ('daraja', 'local'):
+        return [checks.Error(error, id='payments.E001')]
+    # Missing credentials still let the rest of the site run; M-Pesa payments answer 503
+    return [checks.Warning(error, hint='Set them, or MPESA_CLIENT=local for development', id='payments.W001')]
+
+
+def get_client():
+    """The MPESA_CLIENT implementation, built once so its connection pool is shared; raises ImproperlyConfigured"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                error = client_config_error()
+                if error:
+                    raise ImproperlyConfigured(error)
+                if settings.MPESA_CLIENT == 'local':
+                    logger.warning('MPESA_CLIENT is local: STK pushes are accepted without prompting anyone')
+                    _client = LocalDarajaClient()
+                else:
+                    _client = DarajaClient(settings.MPESA_BASE_URL)
+    return _client
@@ -0,0 +1,50 @@
+import logging
+from celery import shared_task
+from django.utils import timezone
+from notifications.models import Notification
+from .models import MPesaTransaction, Payment
+from .mpesa import MPesaError, get_client, stk_push_payload
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def send_stk_push(payment_id):
+    """Prompt the customer's phone for a pending M-Pesa payment; the callback settles it"""
+    # Resolved before the claim so a misconfigured client leaves the payment pending, not stuck processing
+    client = get_client()
+    # Claim the payment first so a redelivered task cannot prompt the customer twice
+    if not Payment.objects.filter(pk=payment_id, method='mpesa', status='pending').update(
+        status='processing', updated_at=timezone.now()
+    ):
+        return
+    payment = Payment.objects.select_related('booking__hostel').get(pk=payment_id)
+
+    description = f'Payment for {payment.booking.hostel.name}'
+    try:
+        response_data = client.stk_push(stk_push_payload(payment, description))
+    except MPesaError as e:
+        logger.warning('STK push for payment %s failed: %s', payment.pk, e)
+        response_data = {'errorMessage': 'M-Pesa is not responding, please try again'}
+
+    if response_data.get('ResponseCode') == '0':
+        MPesaTransaction.objects.create(
+            payment=payment,
+            merchant_request_id=response_data.get('MerchantRequestID'),
+            checkout_request_id=response_data.get('CheckoutRequestID'),
+            phone_number=payment.phone_number,
+            amount=payment.amount,
+            account_reference=payment.transaction_id,
+            transaction_desc=description
+        )
+        return
+
+    payment.status = 'failed'
+    payment.failure_reason = response_data.get('errorMessage', 'Unknown error')
+    payment.save()
+    Notification.objects.create(
+        user=payment.user,
+        title='Payment Failed',
+        message=f'We could not start your M-Pesa payment for {payment.booking.hostel.name}. Please try again.',
+        type='error'
+    )
@@ -1,44 +1,51 @@
-import requests
-import base64
-import json
+import logging
 from datetime import datetime
-from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from .models import Payment, MPesaTransaction
 from .serializers import PaymentSerializer, MPesaPaymentSerializer, PayPalPaymentSerializer
-from bookings.models import Booking
+from .mpesa import get_client
+from .tasks import send_stk_push
+from core.exports import export_response
+from analytics.rollups import record_payment, record_status_change
+from bookings.inventory import commit_hold
+from bookings.models import Booking, BookingStatusHistory
+
+logger = logging.getLogger(__name__)
 
 class PaymentListView(generics.ListAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Payment.objects.filter(user=self.request.user)
+        return Payment.objects.filter(user=self.request.user).order_by('-created_at')
 
-def get_mpesa_access_token():
-    """Get M-Pesa access token"""
-    consumer_key = settings.MPESA_CONSUMER_KEY
-    consumer_secret = settings.MPESA_CONSUMER_SECRET
-    
-    api_url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
-    
-    r = requests.get(api_url, auth=(consumer_key, consumer_secret))
-    json_response = r.json()
-    
-    return json_response.get('access_token')
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_payments(request):
+    """Stream every payment as CSV or NDJSON (?output=) for reconciliation"""
+    if request.user.role not in ['agent', 'admin']:
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        return export_response(request, 'payments')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-def generate_password():
-    """Generate M-Pesa password"""
-    shortcode = settings.MPESA_SHORTCODE
-    passkey = settings.MPESA_PASSKEY
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    
-    data_to_encode = shortcode + passkey + timestamp
-    encoded_string = base64.b64encode(data_to_encode.encode())
-    
-    return encoded_string.decode('utf-8'), timestamp
+def confirm_paid_booking(payment, reason):
+    """
+    Confirm the payment's booking, recording the transition and the revenue.
+    Callers hold the payment's row lock and have checked it was not already completed.
+    """
+    booking = payment.booking
+    BookingStatusHistory.objects.create(booking=booking, status='confirmed', changed_by=payment.user, reason=reason)
+    record_status_change(booking, booking.status, 'confirmed')
+    record_payment(payment)
+    booking.status = 'confirmed'
+    booking.payment_id = payment.external_transaction_id
+    booking.save()
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -65,63 +72,27 @@ def initiate_mpesa_payment(request):
             phone_number=phone_number
         )
         
-        # Get M-Pesa access token
-        access_token = get_mpesa_access_token()
-        password, timestamp = generate_password()
-        
-        # Prepare STK push request
-        api_url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        request_data = {
-            "BusinessShortCode": settings.MPESA_SHORTCODE,
-            "Password": password,
-            "Timestamp": timestamp,
-            "TransactionType": "CustomerPayBillOnline",
-            "Amount": int(amount),
-            "PartyA": phone_number,
-            "PartyB": settings.MPESA_SHORTCODE,
-            "PhoneNumber": phone_number,
-            "CallBackURL": settings.MPESA_CALLBACK_URL,
-            "AccountReference": transaction_id,
-            "TransactionDesc": f"Payment for {booking.hostel.name}"
-        }
-        
-        response = requests.post(api_url, json=request_data, headers=headers)
-        response_data = response.json()
-        
-        if response_data.get('ResponseCode') == '0':
-            # Create M-Pesa transaction record
-            MPesaTransaction.objects.create(
-                payment=payment,
-                merchant_request_id=response_data.get('MerchantRequestID'),
-                checkout_request_id=response_data.get('CheckoutRequestID'),
-                phone_number=phone_number,
-                amount=amount,
-                account_reference=transaction_id,
-                transaction_desc=request_data['TransactionDesc']
-            )
-            
-            payment.status = 'processing'
-            payment.save()
-            
-            return Response({
-                'message': 'STK push sent successfully',
-                'transaction_id': transaction_id,
-                'checkout_request_id': response_data.get('CheckoutRequestID')
-            })
-        else:
+        try:
+            get_client()
+        except ImproperlyConfigured as e:
+            logger.error('M-Pesa payment %s not sent: %s', payment.pk, e)
             payment.status = 'failed'
-            payment.failure_reason = response_data.get('errorMessage', 'Unknown error')
+            payment.failure_reason = 'M-Pesa payments are not available right now'
             payment.save()
-            
             return Response({
-                'error': 'Failed to initiate payment',
-                'details': response_data
-            }, status=status.HTTP_400_BAD_REQUEST)
+                'error': payment.failure_reason,
+                'transaction_id': transaction_id,
+                'status': payment.status
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        # Daraja is called from a worker so a slow response cannot hold up this one
+        transaction.on_commit(lambda: send_stk_push.delay(payment.pk))
+        
+        return Response({
+            'message': 'STK push queued',
+            'transaction_id': transaction_id,
+            'status': payment.status
+        }, status=status.HTTP_202_ACCEPTED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -139,54 +110,59 @@ def mpesa_callback(request):
         result_code = stk_callback.get('ResultCode')
         result_desc = stk_callback.get('ResultDesc')
         
-        # Find the transaction
-        mpesa_transaction = MPesaTransaction.objects.get(
-            checkout_request_id=checkout_request_id
-        )
-        
-        # Update transaction
-        mpesa_transaction.result_code = str(result_code)
-        mpesa_transaction.result_desc = result_desc
-        
-        payment = mpesa_transaction.payment
-        
-        if result_code == 0:  # Success
-            # Extract callback metadata
-            callback_metadata = stk_callback.get('CallbackMetadata', {}).get('Item', [])
-            for item in callback_metadata:
-                if item.get('Name') == 'MpesaReceiptNumber':
-                    mpesa_transaction.mpesa_receipt_number = item.get('Value')
-                    payment.external_transaction_id = item.get('Value')
-            
-            payment.status = 'completed'
-            payment.booking.status = 'confirmed'
-            payment.booking.payment_id = payment.external_transaction_id
-            payment.booking.save()
-            
-            # Create notification
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=payment.user,
-                title='Payment Successful',
-                message=f'Your payment for {payment.booking.hostel.name} has been confirmed.',
-                type='success'
+        with transaction.atomic():
+            # Find the transaction
+            mpesa_transaction = MPesaTransaction.objects.get(
+                checkout_request_id=checkout_request_id
+            )
+            # Safaricom redelivers callbacks; the row lock makes a duplicate wait and then see the settled payment
+            payment = Payment.objects.select_for_update().select_related('booking__hostel').get(
+                pk=mpesa_transaction.payment_id
             )
+            if payment.status == 'completed' or (result_code != 0 and payment.status == 'failed'):
+                return Response({'message': 'Callback already processed'})
             
-        else:  # Failed
-            payment.status = 'failed'
-            payment.failure_reason = result_desc
+            # Update transaction
+            mpesa_transaction.result_code = str(result_code)
+            mpesa_transaction.result_desc = result_desc
             
-            # Create notification
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=payment.user,
-                title='Payment Failed',
-                message=f'Your payment for {payment.booking.hostel.name} failed. Please try again.',
-                type='error'
-            )
-        
-        mpesa_transaction.save()
-        payment.save()
+            if result_code == 0:  # Success
+                # Extract callback metadata
+                callback_metadata = stk_callback.get('CallbackMetadata', {}).get('Item', [])
+                for item in callback_metadata:
+                    if item.get('Name') == 'MpesaReceiptNumber':
+                        mpesa_transaction.mpesa_receipt_number = item.get('Value')
+                        payment.external_transaction_id = item.get('Value')
+                
+                payment.status = 'completed'
+                # Paid in full, so the room is sold even if the hold lapsed and cannot be re-taken
+                commit_hold(payment.booking)
+                confirm_paid_booking(payment, 'M-Pesa payment received')
+                
+                # Create notification
+                from notifications.models import Notification
+                Notification.objects.create(
+                    user=payment.user,
+                    title='Payment Successful',
+                    message=f'Your payment for {payment.booking.hostel.name} has been confirmed.',
+                    type='success'
+                )
+                
+            else:  # Failed
+                payment.status = 'failed'
+                payment.failure_reason = result_desc
+                
+                # Create notification
+                from notifications.models import Notification
+                Notification.objects.create(
+                    user=payment.user,
+                    title='Payment Failed',
+                    message=f'Your payment for {payment.booking.hostel.name} failed. Please try again.',
+                    type='error'
+                )
+            
+            mpesa_transaction.save()
+            payment.save()
         
         return Response({'message': 'Callback processed successfully'})
         
@@ -241,13 +217,18 @@ def initiate_paypal_payment(request):
         import time
         time.sleep(2)
         
-        # Mark payment as completed
-        payment.status = 'completed'
-        payment.external_transaction_id = f"PAYPAL_{transaction_id}"
-        payment.booking.status = 'confirmed'
-        payment.booking.payment_id = payment.external_transaction_id
-        payment.booking.save()
-        payment.save()
+        with transaction.atomic():
+            # Same guard as the M-Pesa callback: confirm a payment and record its revenue only once
+            payment = Payment.objects.select_for_update().select_related('booking__hostel').get(pk=payment.pk)
+            if payment.status == 'completed':
+                return Response({'error': 'Payment was already processed'}, status=status.HTTP_409_CONFLICT)
+            
+            # Mark payment as completed
+            payment.status = 'completed'
+            payment.external_transaction_id = f"PAYPAL_{transaction_id}"
+            commit_hold(payment.booking)
+            confirm_paid_booking(payment, 'PayPal payment received')
+            payment.save()
         
         # Create notification
         from notifications.models import Notification
@@ -16,6 +16,11 @@ class Review(models.Model):
     
     class Meta:
         unique_together = ['hostel', 'user']
+        indexes = [
+            # A hostel's reviews, newest first
+            models.Index(fields=['hostel', '-created_at', '-id']),
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.hostel.name} ({self.rating}/5)"
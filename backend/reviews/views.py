@@ -1,13 +1,18 @@
+from django.db import transaction
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from analytics.rollups import record_review
+from core.pagination import FeedPagination
+from hostels.models import Hostel
 from .models import Review, ReviewHelpful
 from .serializers import ReviewSerializer, ReviewCreateSerializer
 
 class ReviewListCreateView(generics.ListCreateAPIView):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['hostel', 'rating']
+    pagination_class = FeedPagination
     ordering = ['-created_at']
     
     def get_serializer_class(self):
@@ -21,7 +26,13 @@ class ReviewListCreateView(generics.ListCreateAPIView):
         return [permissions.AllowAny()]
     
     def get_queryset(self):
-        return Review.objects.all()
+        return Review.objects.order_by('-created_at', '-id')
+    
+    @transaction.atomic
+    def perform_create(self, serializer):
+        review = serializer.save()
+        Hostel.adjust_rating(review.hostel_id, review.rating, 1)
+        record_review(review, review.rating, 1)
 
 class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Review.objects.all()
@@ -34,6 +45,21 @@ class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
             if obj.user != self.request.user and not self.request.user.is_staff:
                 raise permissions.PermissionDenied("You can only modify your own reviews")
         return obj
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_rating = serializer.instance.rating
+        review = serializer.save()
+        if review.rating != previous_rating:
+            Hostel.adjust_rating(review.hostel_id, review.rating - previous_rating, 0)
+            record_review(review, review.rating - previous_rating, 0)
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        hostel_id, rating = instance.hostel_id, instance.rating
+        instance.delete()
+        Hostel.adjust_rating(hostel_id, -rating, -1)
+        record_review(instance, -rating, -1)
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -61,7 +87,8 @@ def mark_helpful(request, review_id):
 class HostelReviewsView(generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         hostel_id = self.kwargs['hostel_id']
-        return Review.objects.filter(hostel_id=hostel_id)
\ No newline at end of file
+        return Review.objects.filter(hostel_id=hostel_id).order_by('-created_at', '-id')
\ No newline at end of file